@@ -0,0 +1,12 @@
+"""Benchmarks for the grade sync pipeline.
+
+Run from the repository root: `python -m benchmarks.run --output bench.json`.
+"""
+
+import os
+import sys
+
+# The application modules import each other as top-level modules from src/.
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,92 @@
+"""Synthetic OASIS semester pages shaped like the real `reload_semester` responses."""
+
+from __future__ import annotations
+
+import random
+
+_EXAM_KINDS = ("Examen final", "Partiel", "Contrôle continu", "TP noté", "Projet", "Oral")
+_SUBJECTS = ("Analyse", "Algèbre linéaire", "Probabilités", "Réseaux", "Bases de données", "Compilation", "Anglais", "Gestion de projet")
+_APPRECIATIONS = ("&mdash;", "Très bien", "Bien", "Assez bien", "Passable", "")
+
+
+def _note(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return "&mdash;"
+    return f"{rng.uniform(4, 20):.2f}".replace(".", ",")
+
+
+def generate_semester_html(
+    *,
+    n_tests: int = 40,
+    n_modules: int = 12,
+    n_ues: int = 4,
+    year: int = 2025,
+    semester: int = 1,
+    seed: int = 0,
+) -> str:
+    """Build one semester page with `Tests*`, `Courses*` and `UEs*` tables.
+
+    The same arguments always yield the same page, so benchmark runs compare.
+    """
+    rng = random.Random(seed * 1_000 + semester)
+    cohort = rng.randint(30, 180)
+
+    modules = [f"MOD{semester}{i:02d}" for i in range(max(n_modules, 1))]
+    ues = [f"UE{semester}{i:02d}" for i in range(max(n_ues, 1))]
+
+    test_rows = []
+    for i in range(n_tests):
+        module = modules[i % len(modules)]
+        kind = _EXAM_KINDS[i % len(_EXAM_KINDS)]
+        test_rows.append(
+            "<tr>"
+            f'<td><div class="courseLine" data-code="{module}">{module}</div></td>'
+            f"<td>\n  {kind} {i // len(modules) + 1}\n</td>"
+            f"<td>{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{year}</td>"
+            f"<td>{_note(rng)}</td>"
+            f"<td>{_note(rng)}</td>"
+            f"<td>{rng.randint(1, cohort)}/{cohort}</td>"
+            f"<td>{rng.choice(_APPRECIATIONS)}</td>"
+            "</tr>"
+        )
+
+    module_rows = []
+    for i, module in enumerate(modules[:n_modules]):
+        module_rows.append(
+            "<tr>"
+            f"<td>{module}</td>"
+            f"<td>{ues[i % len(ues)]}</td>"
+            f"<td>{_SUBJECTS[i % len(_SUBJECTS)]}</td>"
+            f"<td>{rng.choice(('1', '1,5', '2', '3'))}</td>"
+            f"<td>BLOC{i % 3}</td>"
+            f"<td>{_note(rng)}</td>"
+            f"<td>{_note(rng)}</td>"
+            f"<td>{rng.randint(1, cohort)}/{cohort}</td>"
+            f"<td>{rng.choice(('3', '4,5', '6'))}</td>"
+            "</tr>"
+        )
+
+    ue_rows = []
+    for i, ue in enumerate(ues[:n_ues]):
+        ue_rows.append(
+            "<tr>"
+            f"<td>{ue}</td>"
+            f"<td>Unité d'enseignement {i + 1}</td>"
+            f"<td>{rng.choice(('6', '9', '12'))}</td>"
+            f"<td>{_note(rng)}</td>"
+            f"<td>{_note(rng)}</td>"
+            f"<td>{rng.randint(1, cohort)}/{cohort}</td>"
+            f"<td>{rng.choice(('ADM', 'AJ', 'ADM'))}</td>"
+            "</tr>"
+        )
+
+    head = "<thead><tr><th>Code</th><th>Libellé</th><th>Date</th><th>Note</th><th>Moyenne</th><th>Rang</th><th>Appréciation</th></tr></thead>"
+    return (
+        '<div class="semesterContent">'
+        f'<div class="semesterHeader">Semestre {semester} &ndash; <span class="semesterAverage">&nbsp;{_note(rng)}&nbsp;</span></div>'
+        f'<table id="UEs{semester}{year}" class="table">{head}<tbody>{"".join(ue_rows)}</tbody></table>'
+        f'<table id="Courses{semester}{year}" class="table">{head}<tbody>{"".join(module_rows)}</tbody></table>'
+        f'<table id="Tests{semester}{year}" class="table table-striped">{head}<tbody>{"".join(test_rows)}</tbody></table>'
+        "<script>$(function () { $('.courseLine').tooltip(); });</script>"
+        "</div>"
+    )
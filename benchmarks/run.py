@@ -0,0 +1,238 @@
+"""Run the benchmark suite and write the results as JSON.
+
+    python -m benchmarks.run --output bench.json --accounts 1 5 20 --latency 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from benchmarks.generator import generate_semester_html
+from benchmarks.server import StandInServer
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {
+        "runs": len(samples),
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "max_s": max(samples),
+    }
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+async def _atime(fn: Callable[[], Awaitable[Any]], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def bench_parse(sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    from parsing import _ENGINES, parse_grades
+
+    results = []
+    for size in sizes:
+        html = generate_semester_html(n_tests=size)
+        reference = [(g.key, g.fingerprint) for g in parse_grades(html, "bs4")]
+        for engine in sorted(_ENGINES):
+            grades = [(g.key, g.fingerprint) for g in parse_grades(html, engine)]
+            results.append({
+                "name": "parse_grades",
+                "engine": engine,
+                "n_tests": size,
+                "html_bytes": len(html.encode("utf-8")),
+                "matches_bs4": grades == reference,
+                **_time(lambda: parse_grades(html, engine), repeat),
+            })
+    return results
+
+
+async def bench_db_sync(sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    from database import Database
+    from Models.Grade import Grade
+    from parsing import parse_grades
+    from sync import _sync_grades_for_semester
+
+    results = []
+    for size in sizes:
+        grades = parse_grades(generate_semester_html(n_tests=size))
+        # Same keys, ~1% of values changed: the typical poll that finds something.
+        n_changed = max(1, size // 100)
+        changed = [
+            Grade(g.module_code, g.name, g.date, g.note, "0,00", g.rank, g.appreciation) for g in grades[:n_changed]
+        ] + grades[n_changed:]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            async with Database(os.path.join(tmp, "bench.db")) as db:
+                await db.create_tables()
+                counter = iter(range(1_000_000))
+
+                async def first_sync() -> None:
+                    await _sync_grades_for_semester(db, student=f"s{next(counter)}", year=2025, semester=1, grades=grades)
+
+                async def unchanged() -> None:
+                    await _sync_grades_for_semester(db, student="s0", year=2025, semester=1, grades=grades)
+
+                flip = iter(range(1_000_000))
+
+                async def one_percent_changed() -> None:
+                    batch = changed if next(flip) % 2 == 0 else grades
+                    await _sync_grades_for_semester(db, student="s0", year=2025, semester=1, grades=batch)
+
+                for label, fn in (("insert", first_sync), ("unchanged", unchanged), ("1pct_changed", one_percent_changed)):
+                    results.append({
+                        "name": "sync_grades_for_semester",
+                        "case": label,
+                        "n_grades": size,
+                        **(await _atime(fn, repeat)),
+                    })
+    return results
+
+
+def bench_webhook(sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    from webhook import _to_embed_payloads
+
+    results = []
+    for size in sizes:
+        lines = ["New: 0 | Updated: %d" % size]
+        lines.extend(f"UPD S1 MOD{i:03d} | Examen final {i} | 12/01/2025 | 12,50->13,25" for i in range(size))
+        message = "\n".join(lines)
+        results.append({"name": "webhook_format", "lines": size, **_time(lambda: _to_embed_payloads([message]), repeat)})
+    return results
+
+
+async def bench_sync_once(account_counts: list[int], repeat: int, latency: float, n_tests: int) -> list[dict[str, Any]]:
+    results = []
+    async with StandInServer(latency=latency, n_tests=n_tests) as server:
+        os.environ["OASIS_BASE_URL"] = server.base_url
+        os.environ.pop("WEBHOOK_URL", None)
+        import sync
+        from database import Database
+        from sync import sync_once
+        from transport import OasisTransport, new_oasis_client
+
+        # sync builds its URLs at import time, possibly before the server existed.
+        for name in ("LOGIN_URL", "SEMESTER_URL"):
+            url = getattr(sync, name)
+            setattr(sync, name, server.base_url + url[url.index("/prod/"):])
+
+        for count in account_counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                async with Database(os.path.join(tmp, "bench.db")) as db:
+                    await db.create_tables()
+                    transport = OasisTransport(max_connections=10)
+                    sessions = [new_oasis_client(transport) for _ in range(count)]
+
+                    async def cycle() -> None:
+                        await asyncio.gather(*(
+                            sync_once(session=session, db=db, login=f"student{i}", password="x")
+                            for i, session in enumerate(sessions)
+                        ))
+
+                    try:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            cold = await _atime(cycle, 1)
+                            warm = await _atime(cycle, repeat)
+                    finally:
+                        await transport.aclose()
+
+            results.append({"name": "sync_once", "case": "cold", "accounts": count, "latency_s": latency, **cold})
+            results.append({"name": "sync_once", "case": "warm", "accounts": count, "latency_s": latency, **warm})
+        results.append({"name": "stand_in_requests", **server.requests})
+    return results
+
+
+async def bench_cold_start(repeat: int) -> list[dict[str, Any]]:
+    """Spawn `main.py --once --dry-run` and time process start to its first OASIS request and to exit."""
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    first_request: list[float] = []
+    total: list[float] = []
+    exit_codes: set[int] = set()
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            async with StandInServer() as server:
+                env = {
+                    **os.environ,
+                    "OASIS_BASE_URL": server.base_url,
+                    "OASIS_LOGIN": "student0",
+                    "OASIS_PASSWORD": "x",
+                    "DB_PATH": os.path.join(tmp, "bench.db"),
+                    "SESSION_KEY_FILE": os.path.join(tmp, "session.key"),
+                    "WEBHOOK_URL": "",
+                }
+                env.pop("ACCOUNTS_FILE", None)
+                start = time.perf_counter()
+                process = await asyncio.create_subprocess_exec(
+                    sys.executable, "main.py", "--once", "--dry-run",
+                    cwd=src, env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+                )
+                exit_codes.add(await process.wait())
+                total.append(time.perf_counter() - start)
+                if server.first_request_at is not None:
+                    first_request.append(server.first_request_at - start)
+    results = [{"name": "cold_start", "case": "process_exit", "exit_codes": sorted(exit_codes), **_summary(total)}]
+    if first_request:
+        results.append({"name": "cold_start", "case": "first_request", **_summary(first_request)})
+    return results
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    results: list[dict[str, Any]] = []
+    results += bench_parse(args.sizes, args.repeat)
+    results += await bench_db_sync(args.sizes, args.repeat)
+    results += bench_webhook(args.sizes, args.repeat)
+    results += await bench_sync_once(args.accounts, args.repeat, args.latency, args.sizes[0])
+    results += await bench_cold_start(args.repeat)
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[40, 400], help="grades per semester page")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in server latency per request (s)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_run(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for row in report["results"]:
+        label = " ".join(f"{k}={v}" for k, v in row.items() if not k.endswith("_s") and k != "runs")
+        timing = f" median={row['median_s'] * 1000:.2f}ms" if "median_s" in row else ""
+        print(f"{label}{timing}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""A local stand-in for the OASIS `LOGIN_URL`/`SEMESTER_URL` routes.
+
+Speaks just enough HTTP/1.1 (keep-alive, Content-Length bodies) for httpx.
+Point the app at it by setting `OASIS_BASE_URL` to `server.base_url`
+*before* importing `sync`, since the URLs are built at import time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import secrets
+import time
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+
+from benchmarks.generator import generate_semester_html
+
+TOKEN_COOKIE_NAME = "bo_oasis_polytech_parisSession"
+CURRENT_YEAR_COOKIE = "bo_oasis_polytech_parisyear"
+
+
+class StandInServer:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        year: int = 2025,
+        n_tests: int = 40,
+        session_ttl: int = 3600,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.year = year
+        self.n_tests = n_tests
+        self.session_ttl = session_ttl
+        self.host = host
+        self.port = port
+        self.requests = {"login": 0, "semester": 0, "unauthorized": 0}
+        # time.perf_counter() when the first request line arrived.
+        self.first_request_at: float | None = None
+        self._sessions: set[str] = set()
+        self._pages: dict[tuple[str, int], bytes] = {}
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "StandInServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    def _page(self, student: str, semester: int) -> bytes:
+        key = (student, semester)
+        if key not in self._pages:
+            html = generate_semester_html(
+                n_tests=self.n_tests,
+                year=self.year,
+                semester=semester,
+                seed=sum(map(ord, student)),
+            )
+            self._pages[key] = json.dumps({"html": html}).encode("utf-8")
+        return self._pages[key]
+
+    def _route(self, target: str, cookies: dict[str, str], form: dict[str, str]) -> tuple[int, list[tuple[str, str]], bytes]:
+        route = parse_qs(urlsplit(target).query).get("route", [""])[0]
+        if route.endswith("User::login"):
+            self.requests["login"] += 1
+            token = secrets.token_hex(16)
+            self._sessions.add(token)
+            headers = [
+                ("Set-Cookie", f"{TOKEN_COOKIE_NAME}={token}; Max-Age={self.session_ttl}; Path=/"),
+                ("Set-Cookie", f"{CURRENT_YEAR_COOKIE}={self.year}; Max-Age={self.session_ttl}; Path=/"),
+            ]
+            return 200, headers, b'{"success": true}'
+
+        if route.endswith("::reload_semester"):
+            if cookies.get(TOKEN_COOKIE_NAME) not in self._sessions:
+                self.requests["unauthorized"] += 1
+                return 401, [], b'{"error": "not logged in"}'
+            self.requests["semester"] += 1
+            semester = int(form.get("semester_in_year", "1") or 1)
+            return 200, [], self._page(form.get("student", ""), semester)
+
+        return 404, [], b"{}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if self.first_request_at is None:
+                    self.first_request_at = time.perf_counter()
+                _method, target, _version = request_line.decode("latin-1").split(" ", 2)
+
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                form = {
+                    unquote_plus(k): unquote_plus(v)
+                    for k, _, v in (pair.partition("=") for pair in body.decode("utf-8").split("&") if pair)
+                }
+                cookies = {
+                    k.strip(): v.strip()
+                    for k, _, v in (part.partition("=") for part in headers.get("cookie", "").split(";") if part)
+                }
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, extra_headers, payload = self._route(target, cookies, form)
+
+                head = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}"]
+                head.append("Content-Type: application/json")
+                head.append(f"Content-Length: {len(payload)}")
+                head.extend(f"{k}: {v}" for k, v in extra_headers)
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
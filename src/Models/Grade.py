@@ -1,10 +1,70 @@
 class Grade:
+    """One row of a "Tests" table.
+
+    `key` identifies the grade within a semester and `fingerprint` captures its
+    values, so change detection is a single tuple comparison. Both are built
+    once here and hold the values themselves; the field attributes read from
+    them. Grades are immutable, so they are safe to hash and keep in sets.
+    """
+
+    __slots__ = ("key", "fingerprint")
+
+    # Field names of the fingerprint, in order.
+    FINGERPRINT_FIELDS = ("note", "avg_note", "rank", "appreciation")
+
+    key: tuple[str, str, str]
+    fingerprint: tuple[str, str, str, str]
+
     def __init__(self, module_code: str, name: str, date: str, note: str, avg_note: str, rank: str, appreciation: str):
-        self.id = None  # Will be set when inserted into DB
-        self.module_code = module_code
-        self.name = name
-        self.date = date
-        self.note = note
-        self.avg_note = avg_note
-        self.rank = rank
-        self.appreciation = appreciation
+        object.__setattr__(self, "key", (module_code, name, date))
+        object.__setattr__(self, "fingerprint", Grade.make_fingerprint(note, avg_note, rank, appreciation))
+
+    @staticmethod
+    def make_fingerprint(note: str | None, avg_note: str | None, rank: str | None, appreciation: str | None) -> tuple[str, str, str, str]:
+        # Missing values (NULL in the DB) compare equal to empty strings.
+        return (note or "", avg_note or "", rank or "", appreciation or "")
+
+    @property
+    def module_code(self) -> str:
+        return self.key[0]
+
+    @property
+    def name(self) -> str:
+        return self.key[1]
+
+    @property
+    def date(self) -> str:
+        return self.key[2]
+
+    @property
+    def note(self) -> str:
+        return self.fingerprint[0]
+
+    @property
+    def avg_note(self) -> str:
+        return self.fingerprint[1]
+
+    @property
+    def rank(self) -> str:
+        return self.fingerprint[2]
+
+    @property
+    def appreciation(self) -> str:
+        return self.fingerprint[3]
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"Grade is immutable (tried to set {name!r})")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Grade is immutable (tried to delete {name!r})")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Grade):
+            return NotImplemented
+        return self.key == other.key and self.fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return hash((self.key, self.fingerprint))
+
+    def __repr__(self) -> str:
+        return f"Grade(key={self.key!r}, fingerprint={self.fingerprint!r})"
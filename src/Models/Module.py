@@ -1,10 +1,15 @@
-class Module:
-    def __init__(self, code: str, name: str, date: str, note: str, avg_note: str, rank: str, appreciation: str):
-        self.id = None  # Will be set when inserted into DB
-        self.code = code
-        self.name = name
-        self.date = date
-        self.note = note
-        self.avg_note = avg_note
-        self.rank = rank
-        self.appreciation = appreciation
\ No newline at end of file
+from typing import NamedTuple
+
+
+class Module(NamedTuple):
+    """One row of a "Courses" table; immutable, compared and hashed by value."""
+
+    module_code: str
+    ue_code: str
+    title_fr: str
+    coef: float
+    bloc_code: str
+    note: str
+    avg_note: str
+    rank: str
+    ec: str
@@ -0,0 +1,15 @@
+from Models.Grade import Grade
+from Models.Module import Module
+from Models.UE import UE
+
+
+class Semester:
+    """Everything extracted from one semester page."""
+
+    __slots__ = ("grades", "modules", "ues", "average")
+
+    def __init__(self, grades: list[Grade], modules: list[Module], ues: list[UE], average: str):
+        self.grades = grades
+        self.modules = modules
+        self.ues = ues
+        self.average = average
@@ -1,9 +1,13 @@
-class UE:
-    def __init__(self, ue_code: str, title_fr: str, ects: str, note: str, avg_note: str, rank: str, resultat: str):
-        self.ue_code = ue_code
-        self.title_fr = title_fr
-        self.ects = ects
-        self.note = note
-        self.avg_note = avg_note
-        self.rank = rank
-        self.resultat = resultat
\ No newline at end of file
+from typing import NamedTuple
+
+
+class UE(NamedTuple):
+    """One row of a "UEs" table; immutable, compared and hashed by value."""
+
+    ue_code: str
+    title_fr: str
+    ects: float
+    note: str
+    avg_note: str
+    rank: str
+    resultat: str
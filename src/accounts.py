@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+import os
+
+
+class Account:
+    def __init__(self, login: str, password: str):
+        self.login = login
+        self.password = password
+
+    def __repr__(self) -> str:
+        # Never leak the password in logs.
+        return f"Account(login={self.login!r})"
+
+
+def load_accounts() -> list[Account]:
+    """Load the accounts to sync.
+
+    `ACCOUNTS_FILE` points to a JSON list of `{"login": ..., "password": ...}`
+    objects. Without it, the single `OASIS_LOGIN`/`OASIS_PASSWORD` pair is used.
+    """
+    path = os.environ.get("ACCOUNTS_FILE", "")
+    if not path:
+        login = os.environ.get("OASIS_LOGIN", "")
+        password = os.environ.get("OASIS_PASSWORD", "")
+        if not login or not password:
+            return []
+        return [Account(login, password)]
+
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a JSON list of accounts")
+
+    accounts: list[Account] = []
+    seen: set[str] = set()
+    for entry in entries:
+        login = str(entry.get("login", "")).strip()
+        password = str(entry.get("password", ""))
+        if not login or not password:
+            raise ValueError(f"{path}: every account needs a login and a password")
+        if login in seen:
+            continue
+        seen.add(login)
+        accounts.append(Account(login, password))
+    return accounts
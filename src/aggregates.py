@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Any
+
+from database import Database
+
+
+def _numpy():
+    # Imported on first use: NumPy is the heaviest import in the project and
+    # the sync loop itself never needs it.
+    import numpy
+
+    return numpy
+
+
+def _where(student: str | None, year: int | None, semester: int | None) -> tuple[str, tuple[Any, ...]]:
+    clauses = ["g.note_value IS NOT NULL"]
+    params: list[Any] = []
+    for column, value in (("student", student), ("year", year), ("semester", semester)):
+        if value is not None:
+            clauses.append(f"g.{column} = ?")
+            params.append(value)
+    return " AND ".join(clauses), tuple(params)
+
+
+async def _load(db: Database, student: str | None, year: int | None, semester: int | None):
+    """Numeric grade notes joined with their module coefficient, one row per grade."""
+    where, params = _where(student, year, semester)
+    return await db.execute(
+        f"""
+        SELECT g.student, g.year, g.semester, g.module_code, g.note_value, m.coef
+        FROM grades g
+        LEFT JOIN modules m
+            ON m.student = g.student AND m.year = g.year
+            AND m.semester = g.semester AND m.module_code = g.module_code
+        WHERE {where}
+        ORDER BY g.student, g.year, g.semester, g.module_code;
+        """,
+        params,
+    )
+
+
+def _group_ids(keys: list[tuple[Any, ...]]) -> tuple[list[tuple[Any, ...]], list[int]]:
+    """Dense ids for each distinct key (in first-seen order) and the id of every row."""
+    index: dict[tuple[Any, ...], int] = {}
+    ids = [index.setdefault(key, len(index)) for key in keys]
+    return list(index), ids
+
+
+def _module_stats(rows):
+    np = _numpy()
+    modules, module_ids = _group_ids([row[:4] for row in rows])
+    module_ids = np.asarray(module_ids, dtype=np.intp)
+    notes = np.asarray([row[4] for row in rows], dtype=np.float64)
+
+    counts = np.bincount(module_ids, minlength=len(modules))
+    averages = np.bincount(module_ids, weights=notes, minlength=len(modules)) / counts
+
+    # Every grade of a module carries the same coefficient; take the last one.
+    coefs = np.zeros(len(modules), dtype=np.float64)
+    coefs[module_ids] = np.asarray([row[5] or 0.0 for row in rows], dtype=np.float64)
+    return modules, averages, counts, coefs
+
+
+async def module_averages(
+    db: Database,
+    *,
+    student: str | None = None,
+    year: int | None = None,
+    semester: int | None = None,
+) -> list[tuple[str, int, int, str, float, int]]:
+    """Mean numeric note per module, as (student, year, semester, module_code, average, count).
+
+    Grades without a numeric note (not graded yet, absences) are left out.
+    """
+    rows = await _load(db, student, year, semester)
+    if not rows:
+        return []
+    modules, averages, counts, _ = _module_stats(rows)
+    return [
+        (*module, float(average), int(count))
+        for module, average, count in zip(modules, averages, counts)
+    ]
+
+
+async def semester_averages(
+    db: Database,
+    *,
+    student: str | None = None,
+    year: int | None = None,
+    semester: int | None = None,
+) -> list[tuple[str, int, int, float | None, float]]:
+    """Coefficient-weighted mean of module averages, as (student, year, semester, average, total_coef).
+
+    Modules without a coefficient in `modules` carry no weight; a semester
+    where none has one gets None.
+    """
+    rows = await _load(db, student, year, semester)
+    if not rows:
+        return []
+    np = _numpy()
+    modules, averages, _, coefs = _module_stats(rows)
+    semesters, semester_ids = _group_ids([module[:3] for module in modules])
+    semester_ids = np.asarray(semester_ids, dtype=np.intp)
+
+    weights = np.bincount(semester_ids, weights=coefs, minlength=len(semesters))
+    weighted = np.bincount(semester_ids, weights=averages * coefs, minlength=len(semesters))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        results = weighted / weights
+    return [
+        (*key, float(result) if weight > 0 else None, float(weight))
+        for key, result, weight in zip(semesters, results, weights)
+    ]
@@ -0,0 +1,167 @@
+"""Local read-only JSON API over the synced data.
+
+Enable it with `API_PORT` (e.g. 8080); it binds `API_HOST`, 127.0.0.1 by
+default (the Docker image sets 0.0.0.0). Endpoints, all GET:
+
+    /students/<login>/grades?year=&semester=
+    /students/<login>/averages
+    /students/<login>/changes?since=<cursor>&limit=
+
+Responses are cached in memory per student and URL until the sync writes a
+new or changed grade, module, UE or average for that student
+(`read_cache.invalidate`). Every response carries an ETag; a matching
+`If-None-Match` gets a 304 without touching the cache or the database. The cache only hears about this
+process's syncs, so the API is not started in worker mode.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+from collections import OrderedDict
+from typing import Any
+
+from aggregates import semester_averages
+from database import Database
+from httpserver import Response, serve
+
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "0"))
+API_CACHE_SIZE = int(os.environ.get("API_CACHE_SIZE", "512"))
+API_CHANGES_LIMIT = int(os.environ.get("API_CHANGES_LIMIT", "500"))
+
+_JSON_HEADERS = {"Content-Type": "application/json; charset=utf-8", "Cache-Control": "no-cache"}
+
+_GRADE_FIELDS = (
+    "year", "semester", "module_code", "name", "date", "note", "avg_note", "rank",
+    "appreciation", "note_value", "avg_value", "rank_pos", "rank_size",
+)
+_CHANGE_FIELDS = (
+    "seq", "student", "year", "semester", "module_code", "name", "date", "kind",
+    "field", "old_value", "new_value", "recorded_at",
+)
+
+
+class ReadCache:
+    """Rendered responses keyed by URL, tagged with the student's data generation.
+
+    A generation only moves when the sync writes changed data for that
+    student, so a cached body (and its ETag) stays valid until then.
+    Generations restart at 0 with the process; the per-process token in the
+    ETag keeps clients from revalidating against a previous run.
+    """
+
+    def __init__(self, max_entries: int = API_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._token = secrets.token_hex(4)
+        self._generations: dict[str, int] = {}
+        self._entries: OrderedDict[tuple[str, str], tuple[int, bytes]] = OrderedDict()
+
+    def etag(self, student: str) -> str:
+        return f'"{self._token}-{self._generations.get(student, 0)}"'
+
+    def invalidate(self, student: str) -> None:
+        # Stale entries are replaced lazily (or evicted) once the generation moved.
+        self._generations[student] = self._generations.get(student, 0) + 1
+
+    def get(self, student: str, url: str) -> bytes | None:
+        entry = self._entries.get((student, url))
+        if entry is None or entry[0] != self._generations.get(student, 0):
+            return None
+        self._entries.move_to_end((student, url))
+        return entry[1]
+
+    def put(self, student: str, url: str, generation: int, body: bytes) -> None:
+        self._entries[(student, url)] = (generation, body)
+        self._entries.move_to_end((student, url))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def generation(self, student: str) -> int:
+        return self._generations.get(student, 0)
+
+
+read_cache = ReadCache()
+
+
+def _int_param(query: dict[str, list[str]], name: str) -> int | None:
+    values = query.get(name)
+    if not values:
+        return None
+    return int(values[0])
+
+
+async def _render(db: Database, student: str, resource: str, query: dict[str, list[str]]) -> Any:
+    if resource == "grades":
+        rows = await db.get_student_grades(
+            student=student, year=_int_param(query, "year"), semester=_int_param(query, "semester")
+        )
+        return [dict(zip(_GRADE_FIELDS, row)) for row in rows]
+    if resource == "averages":
+        displayed = {(year, semester): average for year, semester, average in await db.get_semester_averages(student=student)}
+        computed = {
+            (year, semester): (average, total_coef)
+            for _student, year, semester, average, total_coef in await semester_averages(db, student=student)
+        }
+        averages = []
+        for key in sorted(displayed.keys() | computed.keys()):
+            weighted_average, total_coef = computed.get(key, (None, 0.0))
+            averages.append({
+                "year": key[0],
+                "semester": key[1],
+                "average": displayed.get(key),
+                "weighted_average": weighted_average,
+                "total_coef": total_coef,
+            })
+        return averages
+    # "changes"
+    limit = _int_param(query, "limit")
+    if limit is None:
+        limit = API_CHANGES_LIMIT
+    elif limit < 1:
+        # SQLite reads a negative LIMIT as "no limit"; reject it like a bad cursor.
+        raise ValueError(f"limit must be positive, got {limit}")
+    limit = min(limit, API_CHANGES_LIMIT)
+    rows, cursor = await db.changes_since(_int_param(query, "since") or 0, limit, student=student)
+    return {"changes": [dict(zip(_CHANGE_FIELDS, row)) for row in rows], "cursor": cursor}
+
+
+def _handler(db: Database, cache: ReadCache):
+    async def handle(path: str, query: dict[str, list[str]], headers: dict[str, str]) -> Response:
+        parts = path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "students" or parts[2] not in ("grades", "averages", "changes"):
+            return 404, {}, b""
+        student, resource = parts[1], parts[2]
+
+        etag = cache.etag(student)
+        response_headers = {**_JSON_HEADERS, "ETag": etag}
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            return 304, response_headers, b""
+
+        url = resource + "?" + "&".join(f"{k}={v[0]}" for k, v in sorted(query.items()))
+        body = cache.get(student, url)
+        if body is None:
+            generation = cache.generation(student)
+            try:
+                payload = await _render(db, student, resource, query)
+            except ValueError:
+                return 400, {}, b""
+            body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            # A write during the read may have moved the generation; the body then
+            # keeps the older ETag and is not cached, so the next poll refetches.
+            if generation == cache.generation(student):
+                cache.put(student, url, generation, body)
+        return 200, response_headers, body
+
+    return handle
+
+
+async def start_api_server(db: Database, host: str = API_HOST, port: int = API_PORT) -> asyncio.Server | None:
+    """Serve the read API in the background; returns None when API_PORT is unset."""
+    if not port:
+        return None
+    server = await serve(_handler(db, read_cache), host, port)
+    print(f"Read API available on http://{host}:{port}/students/<login>/grades")
+    return server
@@ -0,0 +1,160 @@
+"""One-off import of past years for accounts the sync loop has only seen recently.
+
+    python backfill.py [--years N] [--account LOGIN]
+
+`sync_once` only follows the current year. This reads the years the student
+has from the year selector on their current semester page and fetches every
+(year, semester) page before the current one through the regular semester
+pipeline with at most BACKFILL_CONCURRENCY pages in flight per
+account. Each semester is stored in its own transactions as soon as it
+arrives and then checkpointed, so an interrupted run picks up where it
+stopped. No webhooks are sent for backfilled grades.
+
+When the page has no year selector (or it can't be fetched), it falls back to
+walking back BACKFILL_YEARS years from the current one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+
+import httpx
+
+from accounts import Account, load_accounts
+from database import Database
+from parsing import parse_available_years
+from sync import (
+    SEMESTER_TAB,
+    SEMESTERS,
+    _fetch_semester_html,
+    _get_year_value,
+    _sync_semester,
+    ensure_valid_session,
+    oasis_clients,
+)
+
+DB_PATH = os.environ.get("DB_PATH", "grades.db")
+BACKFILL_YEARS = int(os.environ.get("BACKFILL_YEARS", "6"))
+BACKFILL_CONCURRENCY = int(os.environ.get("BACKFILL_CONCURRENCY", "3"))
+
+
+async def _past_years(session: httpx.AsyncClient, account: Account, current_year: int) -> list[int] | None:
+    """The years before `current_year` OASIS lists for the student; None when it lists none."""
+    try:
+        html = await _fetch_semester_html(
+            session,
+            student=account.login,
+            year_value=str(current_year),
+            semester_in_year=SEMESTERS[0],
+            tab=SEMESTER_TAB,
+            login=account.login,
+            password=account.password,
+        )
+    except httpx.HTTPError as exc:
+        print(f"[{account.login}] Could not read the years listed by OASIS: {exc!r}")
+        return None
+    years = parse_available_years(html)
+    if not years:
+        return None
+    return [year for year in years if year < current_year]
+
+
+async def backfill_account(
+    account: Account,
+    *,
+    session: httpx.AsyncClient,
+    db: Database,
+    years: int = BACKFILL_YEARS,
+    concurrency: int = BACKFILL_CONCURRENCY,
+) -> dict[tuple[int, int], int]:
+    """Backfill the years before the current one; returns grades written per (year, semester).
+
+    The years are the ones OASIS lists for the student; `years` (counting back
+    from the current one) is only used when it lists none. Semesters already
+    checkpointed are skipped. A failed semester is not
+    checkpointed and is retried by the next run; the first failure is
+    re-raised once every other semester has finished.
+    """
+    login = account.login
+    await ensure_valid_session(session, login, account.password)
+    try:
+        current_year = int(_get_year_value(session))
+    except ValueError:
+        raise RuntimeError(f"[{login}] OASIS year is not numeric; cannot enumerate past years") from None
+
+    past_years = await _past_years(session, account, current_year)
+    if past_years is None:
+        print(f"[{login}] OASIS lists no years; walking back {years} year(s)")
+        past_years = list(range(current_year - 1, current_year - 1 - years, -1))
+
+    done = await db.get_backfill_checkpoints(student=login)
+    pending = [
+        (year, semester)
+        for year in past_years
+        for semester in SEMESTERS
+        if (year, semester) not in done
+    ]
+    print(f"[{login}] Backfill: {len(pending)} semester(s) to fetch, {len(done)} already done")
+
+    fetch_slots = asyncio.Semaphore(concurrency)
+
+    async def run(year: int, semester: int) -> int:
+        new_count, updated_count, _details = await _sync_semester(
+            session,
+            db,
+            login=login,
+            password=account.password,
+            year_value=str(year),
+            year_int=year,
+            semester=semester,
+            tab=SEMESTER_TAB,
+            fetch_slots=fetch_slots,
+        )
+        written = new_count + updated_count
+        await db.set_backfill_checkpoint(student=login, year=year, semester=semester, written=written)
+        print(f"[{login}] Backfilled {year} S{semester}: {written} grade(s)")
+        return written
+
+    results = await asyncio.gather(*(run(year, semester) for year, semester in pending), return_exceptions=True)
+
+    written: dict[tuple[int, int], int] = {}
+    errors: list[BaseException] = []
+    for key, result in zip(pending, results):
+        if isinstance(result, BaseException):
+            errors.append(result)
+        else:
+            written[key] = result
+    if errors:
+        print(f"[{login}] Backfill: {len(errors)} semester(s) failed; they will be retried on the next run")
+        raise errors[0]
+    return written
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Import past years of grades from OASIS.")
+    parser.add_argument("--years", type=int, default=BACKFILL_YEARS, help="how many years before the current one, if OASIS lists none")
+    parser.add_argument("--account", help="only backfill this login")
+    args = parser.parse_args(argv)
+
+    accounts = [a for a in load_accounts() if args.account in (None, a.login)]
+    if not accounts:
+        raise SystemExit("No matching account (set OASIS_LOGIN/OASIS_PASSWORD or ACCOUNTS_FILE).")
+
+    failed = 0
+    async with Database(DB_PATH) as db:
+        await db.create_tables()
+        async with oasis_clients(db) as clients:
+            for account in accounts:
+                session = await clients.open(account.login)
+                try:
+                    await backfill_account(account, session=session, db=db, years=args.years)
+                except Exception as exc:
+                    failed += 1
+                    print(f"[{account.login}] Backfill failed: {exc!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -1,194 +1,636 @@
 from __future__ import annotations
 
-from typing import Any, Sequence
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Sequence
 
 import aiosqlite
 
+from numeric import grade_numbers
+
+
+async def _ensure_column(conn: aiosqlite.Connection, table: str, column: str, column_type: str) -> None:
+    async with conn.execute(f"PRAGMA table_info({table});") as cursor:
+        existing = {r[1] for r in await cursor.fetchall()}  # name is the 2nd column
+    if column in existing:
+        return
+    await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type};")
+
+
+async def _migration_1_baseline(conn: aiosqlite.Connection) -> None:
+    """base tables"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS grades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student TEXT,
+            year INTEGER,
+            semester INTEGER,
+            module_code TEXT NOT NULL,
+            name TEXT NOT NULL,
+            date DATE NOT NULL,
+            note TEXT,
+            avg_note TEXT,
+            rank TEXT,
+            appreciation TEXT
+        );
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS modules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            module_code TEXT NOT NULL,
+            ue_code TEXT NOT NULL,
+            title_fr TEXT NOT NULL,
+            coef REAL NOT NULL,
+            bloc_code TEXT NOT NULL,
+            note TEXT,
+            avg_note TEXT,
+            rank TEXT,
+            ec TEXT
+        );
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS ue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ue_code TEXT NOT NULL,
+            title_fr TEXT NOT NULL,
+            ects REAL NOT NULL,
+            note TEXT,
+            avg_note TEXT,
+            rank TEXT,
+            resultat TEXT NOT NULL
+        );
+    """)
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS page_hashes (
+            student TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            semester INTEGER NOT NULL,
+            tab TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (student, year, semester, tab)
+        );
+    """)
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS semesters (
+            student TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            semester INTEGER NOT NULL,
+            average TEXT,
+            PRIMARY KEY (student, year, semester)
+        );
+    """)
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            student TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            expires_at REAL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # DBs created before per-student rows lack these columns.
+    await _ensure_column(conn, "grades", "student", "TEXT")
+    await _ensure_column(conn, "grades", "year", "INTEGER")
+    await _ensure_column(conn, "grades", "semester", "INTEGER")
+    await _ensure_column(conn, "modules", "ec", "TEXT")
+    for table in ("modules", "ue"):
+        await _ensure_column(conn, table, "student", "TEXT")
+        await _ensure_column(conn, table, "year", "INTEGER")
+        await _ensure_column(conn, table, "semester", "INTEGER")
+
+
+async def _migration_2_unique_grades(conn: aiosqlite.Connection) -> None:
+    """deduplicate grades and add the unique grade key"""
+    # Older versions skipped the index when duplicates existed, leaving every
+    # lookup a full scan. Keep the most recently written copy of each grade.
+    await conn.execute("""
+        DELETE FROM grades
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM grades
+            GROUP BY student, year, semester, module_code, name, date
+        );
+    """)
+    await conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_grades_key ON grades(student, year, semester, module_code, name, date);"
+    )
+
+
+async def _migration_3_module_ue_indexes(conn: aiosqlite.Connection) -> None:
+    """unique keys and lookup indexes for modules and ue"""
+    for table, code in (("modules", "module_code"), ("ue", "ue_code")):
+        await conn.execute(f"""
+            DELETE FROM {table}
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM {table}
+                GROUP BY student, year, semester, {code}
+            );
+        """)
+    await conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_modules_key ON modules(student, year, semester, module_code);"
+    )
+    await conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_ue_key ON ue(student, year, semester, ue_code);"
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_modules_ue ON modules(student, year, semester, ue_code);"
+    )
+
+
+async def _migration_4_grade_events(conn: aiosqlite.Connection) -> None:
+    """append-only grade change log"""
+    # seq is the rowid alias: monotonically increasing (AUTOINCREMENT never
+    # reuses values), so consumers can page through it with a cursor.
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS grade_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            student TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            semester INTEGER NOT NULL,
+            module_code TEXT NOT NULL,
+            name TEXT NOT NULL,
+            date TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            field TEXT NOT NULL,
+            old_value TEXT,
+            new_value TEXT,
+            recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_grade_events_student ON grade_events(student, seq);"
+    )
+
+
+async def _migration_5_numeric_columns(conn: aiosqlite.Connection) -> None:
+    """numeric note, average and rank columns"""
+    # The TEXT columns stay as displayed by OASIS; these are parsed once at
+    # ingest so aggregates don't re-parse French-formatted strings.
+    for table in ("grades", "modules"):
+        await _ensure_column(conn, table, "note_value", "REAL")
+        await _ensure_column(conn, table, "avg_value", "REAL")
+        await _ensure_column(conn, table, "rank_pos", "INTEGER")
+        await _ensure_column(conn, table, "rank_size", "INTEGER")
+
+        async with conn.execute(f"SELECT id, note, avg_note, rank FROM {table};") as cursor:
+            rows = await cursor.fetchall()
+        await conn.executemany(
+            f"UPDATE {table} SET note_value = ?, avg_value = ?, rank_pos = ?, rank_size = ? WHERE id = ?;",
+            [(*grade_numbers(note, avg_note, rank), row_id) for row_id, note, avg_note, rank in rows],
+        )
+
+
+async def _migration_6_backfill_checkpoints(conn: aiosqlite.Connection) -> None:
+    """backfill checkpoints"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            student TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            semester INTEGER NOT NULL,
+            written INTEGER NOT NULL,
+            completed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (student, year, semester)
+        );
+    """)
+
+
+async def _migration_7_account_leases(conn: aiosqlite.Connection) -> None:
+    """account leases for worker mode"""
+    # Times are wall-clock epoch seconds: workers on different hosts compare them.
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS account_leases (
+            login TEXT PRIMARY KEY,
+            owner TEXT,
+            lease_expires REAL NOT NULL DEFAULT 0
+        );
+    """)
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_account_leases_owner ON account_leases(owner);")
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS lease_workers (
+            worker_id TEXT PRIMARY KEY,
+            alive_until REAL NOT NULL
+        );
+    """)
+
+
+# Append new migrations at the end; a DB's PRAGMA user_version is the number applied.
+_MIGRATIONS: list[Callable[[aiosqlite.Connection], Awaitable[None]]] = [
+    _migration_1_baseline,
+    _migration_2_unique_grades,
+    _migration_3_module_ue_indexes,
+    _migration_4_grade_events,
+    _migration_5_numeric_columns,
+    _migration_6_backfill_checkpoints,
+    _migration_7_account_leases,
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
 class Database:
-    def __init__(self, db_path: str):
+    """Async SQLite access over one long-lived connection.
+
+    Call `connect()` (or use `async with Database(...)`) before issuing queries
+    and `close()` when done. Opening the connection once avoids paying the
+    aiosqlite thread start + file open on every statement.
+    """
+
+    def __init__(self, db_path: str, *, cached_statements: int = 256):
         self.db_path = db_path
+        self.cached_statements = cached_statements
+        self._conn: aiosqlite.Connection | None = None
+        # aiosqlite runs statements on a single worker thread, but commits from
+        # interleaved coroutines would still mix; serialize units of work.
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        if self._conn is not None:
+            return
+        conn = await aiosqlite.connect(self.db_path, cached_statements=self.cached_statements)
+        try:
+            # WAL lets readers proceed while a sync writes; NORMAL is durable
+            # across application crashes and only fsyncs at checkpoints.
+            await conn.execute("PRAGMA journal_mode=WAL;")
+            await conn.execute("PRAGMA synchronous=NORMAL;")
+        except BaseException:
+            await conn.close()
+            raise
+        self._conn = conn
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        await conn.close()
+
+    async def __aenter__(self) -> "Database":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            await self.connect()
+        assert self._conn is not None
+        return self._conn
+
+    @asynccontextmanager
+    async def transaction(self, *, immediate: bool = False) -> AsyncIterator[aiosqlite.Connection]:
+        """Run several statements as one unit of work (committed once, rolled back on error).
+
+        `immediate` takes the write lock up front, so reads inside the
+        transaction can't be invalidated by another process writing first.
+        """
+        conn = await self._connection()
+        async with self._lock:
+            await conn.execute("BEGIN IMMEDIATE;" if immediate else "BEGIN;")
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
 
     async def execute(self, query: str, params: Sequence[Any] = ()) -> list[tuple[Any, ...]]:
-        async with aiosqlite.connect(self.db_path) as conn:
+        conn = await self._connection()
+        async with self._lock:
             cursor = await conn.execute(query, params)
+            try:
+                # For statements that don't return rows (INSERT/UPDATE/CREATE/etc.)
+                # SQLite reports no result columns via cursor.description.
+                if cursor.description is None:
+                    rows: list[tuple[Any, ...]] = []
+                else:
+                    rows = list(await cursor.fetchall())
+            finally:
+                await cursor.close()
             await conn.commit()
+            return rows
 
-            # For statements that don't return rows (INSERT/UPDATE/CREATE/etc.)
-            # SQLite reports no result columns via cursor.description.
-            if cursor.description is None:
-                await cursor.close()
-                return []
+    async def schema_version(self) -> int:
+        rows = await self.execute("PRAGMA user_version;")
+        return int(rows[0][0])
 
-            rows = await cursor.fetchall()
-            await cursor.close()
-            return rows
-        
     async def create_tables(self) -> None:
-        await self.execute("""
-            CREATE TABLE IF NOT EXISTS grades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student TEXT,
-                year INTEGER,
-                semester INTEGER,
-                module_code TEXT NOT NULL,
-                name TEXT NOT NULL,
-                date DATE NOT NULL,
-                note TEXT,
-                avg_note TEXT,
-                rank TEXT,
-                appreciation TEXT
-            );
-        """)
-        await self.execute("""
-            CREATE TABLE IF NOT EXISTS modules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                module_code TEXT NOT NULL,
-                ue_code TEXT NOT NULL,
-                title_fr TEXT NOT NULL,
-                coef REAL NOT NULL,
-                bloc_code TEXT NOT NULL,
-                note TEXT,
-                avg_note TEXT,
-                rank TEXT,
-                ec TEXT
-            );
-        """)
-        await self.execute("""
-            CREATE TABLE IF NOT EXISTS ue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ue_code TEXT NOT NULL,
-                title_fr TEXT NOT NULL,
-                ects REAL NOT NULL,
-                note TEXT,
-                avg_note TEXT,
-                rank TEXT,
-                resultat TEXT NOT NULL
-            );
-        """)
+        """Bring the schema up to date; a current DB costs a single PRAGMA read."""
+        version = await self.schema_version()
+        if version >= SCHEMA_VERSION:
+            return
 
-        # Lightweight migrations for existing DBs.
-        await self._ensure_column("grades", "student", "TEXT")
-        await self._ensure_column("grades", "year", "INTEGER")
-        await self._ensure_column("grades", "semester", "INTEGER")
-        await self._ensure_column("modules", "ec", "TEXT")
+        for target, migration in enumerate(_MIGRATIONS, start=1):
+            if target <= version:
+                continue
+            # Workers starting together race here: take the write lock first and
+            # re-check, so each migration runs in exactly one process.
+            async with self.transaction(immediate=True) as conn:
+                async with conn.execute("PRAGMA user_version;") as cursor:
+                    (version,) = await cursor.fetchone()
+                if target <= version:
+                    continue
+                await migration(conn)
+                # user_version lives in the DB header and commits with the migration.
+                await conn.execute(f"PRAGMA user_version = {target};")
+            print(f"Applied database migration {target}: {migration.__doc__}")
 
-        # Unique key to dedupe and enable safe upserts.
-        try:
-            await self.execute(
-                "CREATE UNIQUE INDEX IF NOT EXISTS idx_grades_key ON grades(student, year, semester, module_code, name, date);"
-            )
-        except aiosqlite.Error:
-            # If the table already contains duplicates, SQLite will refuse to create the index.
-            # The app can still run without the index (it just can't rely on conflict upserts).
-            pass
-
-    async def _ensure_column(self, table: str, column: str, column_type: str) -> None:
-        rows = await self.execute(f"PRAGMA table_info({table});")
-        existing = {r[1] for r in rows}  # name is the 2nd column
-        if column in existing:
+    async def upsert_grades(
+        self,
+        *,
+        student: str,
+        year: int,
+        semester: int,
+        rows: Iterable[tuple[str, str, str, str, str, str, str]],
+        events: Iterable[tuple[str, str, str, str, str, str | None, str | None]] = (),
+    ) -> None:
+        """Upsert many grades of one semester in a single transaction.
+
+        Each row is (module_code, name, date, note, avg_note, rank, appreciation).
+        Each event is (module_code, name, date, kind, field, old_value, new_value)
+        and is appended to grade_events in the same transaction. The numeric
+        columns are derived from note, avg_note and rank here.
+        """
+        params = [(student, year, semester, *row, *grade_numbers(*row[3:6])) for row in rows]
+        event_params = [(student, year, semester, *event) for event in events]
+        if not params and not event_params:
             return
-        await self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type};")
 
-    async def insert_grade(self, module_code: str, name: str, date: str, note: str, avg_note: str, rank: str, appreciation: str, year: int) -> None:
-        await self.execute("""
-            INSERT INTO grades (module_code, name, date, note, avg_note, rank, appreciation, year)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?);
-        """, (module_code, name, date, note, avg_note, rank, appreciation, year))
+        # idx_grades_key is guaranteed by migration 2, so ON CONFLICT always has a target.
+        async with self.transaction() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO grades (
+                    student, year, semester, module_code, name, date, note, avg_note, rank, appreciation,
+                    note_value, avg_value, rank_pos, rank_size
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(student, year, semester, module_code, name, date) DO UPDATE SET
+                    note = excluded.note,
+                    avg_note = excluded.avg_note,
+                    rank = excluded.rank,
+                    appreciation = excluded.appreciation,
+                    note_value = excluded.note_value,
+                    avg_value = excluded.avg_value,
+                    rank_pos = excluded.rank_pos,
+                    rank_size = excluded.rank_size;
+                """,
+                params,
+            )
+            await conn.executemany(
+                """
+                INSERT INTO grade_events (student, year, semester, module_code, name, date, kind, field, old_value, new_value)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                event_params,
+            )
 
-    async def get_grade_by_key(
+    async def save_semester_summary(
         self,
         *,
         student: str,
         year: int,
         semester: int,
-        module_code: str,
-        name: str,
-        date: str,
-    ) -> list[tuple[Any, ...]]:
+        modules: Iterable[tuple[str, str, str, float, str, str, str, str, str]],
+        ues: Iterable[tuple[str, str, float, str, str, str, str]],
+        average: str,
+    ) -> bool:
+        """Upsert a semester's module rows, UE rows and average in a single transaction.
+
+        Module rows are (module_code, ue_code, title_fr, coef, bloc_code, note, avg_note, rank, ec);
+        UE rows are (ue_code, title_fr, ects, note, avg_note, rank, resultat).
+        Rows whose values are already stored are left alone; returns whether
+        anything was inserted or changed.
+        """
+        async with self.transaction() as conn:
+            changes_before = conn.total_changes
+            await conn.executemany(
+                """
+                INSERT INTO modules (
+                    student, year, semester, module_code, ue_code, title_fr, coef, bloc_code, note, avg_note, rank, ec,
+                    note_value, avg_value, rank_pos, rank_size
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(student, year, semester, module_code) DO UPDATE SET
+                    ue_code = excluded.ue_code,
+                    title_fr = excluded.title_fr,
+                    coef = excluded.coef,
+                    bloc_code = excluded.bloc_code,
+                    note = excluded.note,
+                    avg_note = excluded.avg_note,
+                    rank = excluded.rank,
+                    ec = excluded.ec,
+                    note_value = excluded.note_value,
+                    avg_value = excluded.avg_value,
+                    rank_pos = excluded.rank_pos,
+                    rank_size = excluded.rank_size
+                WHERE (modules.ue_code, modules.title_fr, modules.coef, modules.bloc_code,
+                       modules.note, modules.avg_note, modules.rank, modules.ec)
+                   IS NOT (excluded.ue_code, excluded.title_fr, excluded.coef, excluded.bloc_code,
+                           excluded.note, excluded.avg_note, excluded.rank, excluded.ec);
+                """,
+                [(student, year, semester, *row, *grade_numbers(*row[5:8])) for row in modules],
+            )
+            await conn.executemany(
+                """
+                INSERT INTO ue (student, year, semester, ue_code, title_fr, ects, note, avg_note, rank, resultat)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(student, year, semester, ue_code) DO UPDATE SET
+                    title_fr = excluded.title_fr,
+                    ects = excluded.ects,
+                    note = excluded.note,
+                    avg_note = excluded.avg_note,
+                    rank = excluded.rank,
+                    resultat = excluded.resultat
+                WHERE (ue.title_fr, ue.ects, ue.note, ue.avg_note, ue.rank, ue.resultat)
+                   IS NOT (excluded.title_fr, excluded.ects, excluded.note, excluded.avg_note, excluded.rank, excluded.resultat);
+                """,
+                [(student, year, semester, *row) for row in ues],
+            )
+            await conn.execute(
+                """
+                INSERT INTO semesters (student, year, semester, average)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(student, year, semester) DO UPDATE SET average = excluded.average
+                WHERE semesters.average IS NOT excluded.average;
+                """,
+                (student, year, semester, average),
+            )
+            return conn.total_changes != changes_before
+
+    async def get_current_grades(self) -> list[tuple[Any, ...]]:
+        return await self.execute("SELECT * FROM grades;")
+
+    async def get_grades_for_semester(self, *, student: str, year: int, semester: int) -> list[tuple[Any, ...]]:
+        """Rows are (id, module_code, name, date, note, avg_note, rank, appreciation).
+
+        Columns are listed explicitly: migrated DBs have student/year/semester
+        appended at the end, so `SELECT *` ordering differs between installs.
+        """
         return await self.execute(
             """
-            SELECT id, note, avg_note, rank, appreciation
+            SELECT id, module_code, name, date, note, avg_note, rank, appreciation
             FROM grades
-            WHERE student = ? AND year = ? AND semester = ? AND module_code = ? AND name = ? AND date = ?
-            LIMIT 1;
+            WHERE student = ? AND year = ? AND semester = ?;
             """,
-            (student, year, semester, module_code, name, date),
+            (student, year, semester),
         )
 
-    async def upsert_grade(
+    async def get_student_grades(
         self,
         *,
         student: str,
-        year: int,
-        semester: int,
-        module_code: str,
-        name: str,
-        date: str,
-        note: str,
-        avg_note: str,
-        rank: str,
-        appreciation: str,
-    ) -> None:
-        async with aiosqlite.connect(self.db_path) as conn:
-            cursor = await conn.execute(
-                """
-                UPDATE grades
-                SET note = ?, avg_note = ?, rank = ?, appreciation = ?
-                WHERE student = ? AND year = ? AND semester = ? AND module_code = ? AND name = ? AND date = ?;
-                """,
-                (
-                    note,
-                    avg_note,
-                    rank,
-                    appreciation,
-                    student,
-                    year,
-                    semester,
-                    module_code,
-                    name,
-                    date,
-                ),
-            )
-            await conn.commit()
+        year: int | None = None,
+        semester: int | None = None,
+    ) -> list[tuple[Any, ...]]:
+        """Rows are (year, semester, module_code, name, date, note, avg_note, rank,
+        appreciation, note_value, avg_value, rank_pos, rank_size)."""
+        query = """
+            SELECT year, semester, module_code, name, date, note, avg_note, rank,
+                   appreciation, note_value, avg_value, rank_pos, rank_size
+            FROM grades
+            WHERE student = ?
+        """
+        params: list[Any] = [student]
+        if year is not None:
+            query += " AND year = ?"
+            params.append(year)
+        if semester is not None:
+            query += " AND semester = ?"
+            params.append(semester)
+        return await self.execute(query + " ORDER BY year, semester, module_code, date, name;", params)
 
-            if cursor.rowcount == 0:
-                await conn.execute(
-                    """
-                    INSERT INTO grades (student, year, semester, module_code, name, date, note, avg_note, rank, appreciation)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-                    """,
-                    (
-                        student,
-                        year,
-                        semester,
-                        module_code,
-                        name,
-                        date,
-                        note,
-                        avg_note,
-                        rank,
-                        appreciation,
-                    ),
-                )
-                await conn.commit()
+    GRADE_EXPORT_COLUMNS = (
+        "student", "year", "semester", "module_code", "name", "date", "note", "avg_note", "rank",
+        "appreciation", "note_value", "avg_value", "rank_pos", "rank_size",
+    )
 
-    async def insert_module(self, module_code: str, ue_code: str, title_fr: str, coef: float, bloc_code: str, note: str, avg_note: str, rank: str, ec: str) -> None:
-        await self.execute("""
-            INSERT INTO modules (module_code, ue_code, title_fr, coef, bloc_code, note, avg_note, rank, ec)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """, (module_code, ue_code, title_fr, coef, bloc_code, note, avg_note, rank, ec))
+    async def iter_grades(
+        self,
+        *,
+        student: str | None = None,
+        year: int | None = None,
+        semester: int | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[list[tuple[Any, ...]]]:
+        """Yield grades in chunks of up to `chunk_size` rows (GRADE_EXPORT_COLUMNS), in id order.
 
-    async def insert_ue(self, ue_code: str, title_fr: str, ects: float, note: str, avg_note: str, rank: str, resultat: str) -> None:
-        await self.execute("""
-            INSERT INTO ue (ue_code, title_fr, ects, note, avg_note, rank, resultat)
-            VALUES (?, ?, ?, ?, ?, ?, ?);
-        """, (ue_code, title_fr, ects, note, avg_note, rank, resultat))
+        Each chunk is a separate keyed query (`id > last id`), so memory stays
+        flat and the shared connection is free for the sync between chunks.
+        Rows written while iterating may or may not be included.
+        """
+        where = ["id > ?"]
+        filters: list[Any] = []
+        for column, value in (("student", student), ("year", year), ("semester", semester)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                filters.append(value)
+        query = (
+            f"SELECT id, {', '.join(self.GRADE_EXPORT_COLUMNS)} FROM grades "
+            f"WHERE {' AND '.join(where)} ORDER BY id LIMIT ?;"
+        )
 
-    async def get_current_grades(self) -> list[tuple[Any, ...]]:
-        return await self.execute("SELECT * FROM grades;")
+        last_id = 0
+        while True:
+            rows = await self.execute(query, (last_id, *filters, chunk_size))
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [row[1:] for row in rows]
+            if len(rows) < chunk_size:
+                return
 
-    async def get_grades_for_semester(self, *, student: str, year: int, semester: int) -> list[tuple[Any, ...]]:
+    async def get_semester_averages(self, *, student: str) -> list[tuple[int, int, str | None]]:
+        """(year, semester, average) as displayed by OASIS."""
         return await self.execute(
-            "SELECT * FROM grades WHERE student = ? AND year = ? AND semester = ?;",
-            (student, year, semester),
-        )
\ No newline at end of file
+            "SELECT year, semester, average FROM semesters WHERE student = ? ORDER BY year, semester;",
+            (student,),
+        )
+
+    async def get_page_hash(self, *, student: str, year: int, semester: int, tab: str) -> str | None:
+        rows = await self.execute(
+            "SELECT content_hash FROM page_hashes WHERE student = ? AND year = ? AND semester = ? AND tab = ?;",
+            (student, year, semester, tab),
+        )
+        return rows[0][0] if rows else None
+
+    async def set_page_hash(self, *, student: str, year: int, semester: int, tab: str, content_hash: str) -> None:
+        await self.execute(
+            """
+            INSERT INTO page_hashes (student, year, semester, tab, content_hash)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(student, year, semester, tab) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                updated_at = CURRENT_TIMESTAMP;
+            """,
+            (student, year, semester, tab, content_hash),
+        )
+
+    async def get_backfill_checkpoints(self, *, student: str) -> set[tuple[int, int]]:
+        """(year, semester) pairs already backfilled for this student."""
+        rows = await self.execute(
+            "SELECT year, semester FROM backfill_checkpoints WHERE student = ?;",
+            (student,),
+        )
+        return {(year, semester) for year, semester in rows}
+
+    async def set_backfill_checkpoint(self, *, student: str, year: int, semester: int, written: int) -> None:
+        """Mark a semester as backfilled; `written` is how many grades it stored."""
+        await self.execute(
+            """
+            INSERT INTO backfill_checkpoints (student, year, semester, written)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(student, year, semester) DO UPDATE SET
+                written = excluded.written,
+                completed_at = CURRENT_TIMESTAMP;
+            """,
+            (student, year, semester, written),
+        )
+
+    async def get_session(self, *, student: str) -> tuple[bytes, float | None] | None:
+        """Returns (encrypted payload, expires_at) for the student's saved OASIS session."""
+        rows = await self.execute("SELECT payload, expires_at FROM sessions WHERE student = ?;", (student,))
+        return (rows[0][0], rows[0][1]) if rows else None
+
+    async def save_session(self, *, student: str, payload: bytes, expires_at: float | None) -> None:
+        await self.execute(
+            """
+            INSERT INTO sessions (student, payload, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(student) DO UPDATE SET
+                payload = excluded.payload,
+                expires_at = excluded.expires_at,
+                updated_at = CURRENT_TIMESTAMP;
+            """,
+            (student, payload, expires_at),
+        )
+
+    async def delete_session(self, *, student: str) -> None:
+        await self.execute("DELETE FROM sessions WHERE student = ?;", (student,))
+
+    async def changes_since(
+        self,
+        cursor: int = 0,
+        limit: int = 500,
+        *,
+        student: str | None = None,
+    ) -> tuple[list[tuple[Any, ...]], int]:
+        """Grade events recorded after `cursor`, oldest first, and the cursor to resume from.
+
+        Rows are (seq, student, year, semester, module_code, name, date, kind,
+        field, old_value, new_value, recorded_at). Pass the returned cursor back
+        in to fetch the next page; it stays put when there is nothing new.
+        """
+        columns = "seq, student, year, semester, module_code, name, date, kind, field, old_value, new_value, recorded_at"
+        if student is None:
+            rows = await self.execute(
+                f"SELECT {columns} FROM grade_events WHERE seq > ? ORDER BY seq LIMIT ?;",
+                (cursor, limit),
+            )
+        else:
+            rows = await self.execute(
+                f"SELECT {columns} FROM grade_events WHERE student = ? AND seq > ? ORDER BY seq LIMIT ?;",
+                (student, cursor, limit),
+            )
+        return rows, (rows[-1][0] if rows else cursor)
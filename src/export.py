@@ -0,0 +1,126 @@
+"""Export stored grades as CSV, JSON Lines or Parquet.
+
+    python export.py --format csv|jsonl|parquet [--output PATH] [--student LOGIN] [--year Y] [--semester S]
+
+Rows are read from the database in chunks of EXPORT_CHUNK_SIZE and written
+out as they arrive, so memory use does not grow with the table. CSV and
+JSONL go to stdout unless --output is given; Parquet needs a file and the
+optional `pyarrow` package (one row group per chunk).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import sys
+from typing import Any, AsyncIterator, TextIO
+
+from database import Database
+
+DB_PATH = os.environ.get("DB_PATH", "grades.db")
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "5000"))
+
+FORMATS = ("csv", "jsonl", "parquet")
+COLUMNS = Database.GRADE_EXPORT_COLUMNS
+
+
+async def _write_csv(chunks: AsyncIterator[list[tuple[Any, ...]]], out: TextIO) -> int:
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    count = 0
+    async for rows in chunks:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+async def _write_jsonl(chunks: AsyncIterator[list[tuple[Any, ...]]], out: TextIO) -> int:
+    count = 0
+    async for rows in chunks:
+        out.writelines(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows)
+        count += len(rows)
+    return count
+
+
+def _parquet_schema(pa):
+    types = {
+        "year": pa.int64(), "semester": pa.int64(), "rank_pos": pa.int64(), "rank_size": pa.int64(),
+        "note_value": pa.float64(), "avg_value": pa.float64(),
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in COLUMNS])
+
+
+async def _write_parquet(chunks: AsyncIterator[list[tuple[Any, ...]]], path: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet export needs pyarrow (pip install pyarrow).") from None
+
+    schema = _parquet_schema(pa)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        async for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            count += len(rows)
+    return count
+
+
+async def export_grades(
+    db: Database,
+    fmt: str,
+    output: str | None = None,
+    *,
+    student: str | None = None,
+    year: int | None = None,
+    semester: int | None = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> int:
+    """Stream matching grades to `output` (stdout when None, except for Parquet); returns the row count."""
+    chunks = db.iter_grades(student=student, year=year, semester=semester, chunk_size=chunk_size)
+    if fmt == "parquet":
+        if output is None:
+            raise ValueError("Parquet export needs an output path")
+        return await _write_parquet(chunks, output)
+
+    write = {"csv": _write_csv, "jsonl": _write_jsonl}.get(fmt)
+    if write is None:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {FORMATS})")
+    if output is None:
+        return await write(chunks, sys.stdout)
+    with open(output, "w", encoding="utf-8", newline="") as out:
+        return await write(chunks, out)
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export stored grades.")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", "-o", help="file to write (default: stdout; required for parquet)")
+    parser.add_argument("--student")
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--semester", type=int)
+    args = parser.parse_args(argv)
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required for parquet")
+
+    async with Database(DB_PATH) as db:
+        # Migration notices must not end up in an export written to stdout.
+        with contextlib.redirect_stdout(sys.stderr):
+            await db.create_tables()
+        count = await export_grades(
+            db, args.format, args.output, student=args.student, year=args.year, semester=args.semester
+        )
+    print(f"Exported {count} grade(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
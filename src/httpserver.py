@@ -0,0 +1,67 @@
+"""A tiny asyncio HTTP/1.1 server for the local metrics and read endpoints.
+
+Only GET/HEAD without request bodies are supported; that is all these
+endpoints need, and it keeps the app free of a web framework dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+# (status, headers, body)
+Response = tuple[int, dict[str, str], bytes]
+# handler(path, query, request headers) -> Response; header names are lower-cased.
+Handler = Callable[[str, dict[str, list[str]], dict[str, str]], Awaitable[Response]]
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+async def _handle(handler: Handler, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, _version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+            except ValueError:
+                break
+
+            headers: dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if method not in ("GET", "HEAD"):
+                status, response_headers, body = 405, {"Allow": "GET, HEAD"}, b""
+            else:
+                url = urlsplit(target)
+                try:
+                    status, response_headers, body = await handler(url.path, parse_qs(url.query), headers)
+                except Exception as exc:
+                    print(f"HTTP handler failed for {target}: {exc!r}")
+                    status, response_headers, body = 500, {}, b""
+
+            head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}", f"Content-Length: {len(body)}"]
+            head.extend(f"{k}: {v}" for k, v in response_headers.items())
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            if method != "HEAD" and status != 304:
+                writer.write(body)
+            await writer.drain()
+
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(handler: Handler, host: str, port: int) -> asyncio.Server:
+    """Start serving in the background; close the returned server to stop."""
+    return await asyncio.start_server(lambda r, w: _handle(handler, r, w), host, port)
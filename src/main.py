@@ -1,307 +1,148 @@
-import os
-import time
-import asyncio
-from typing import Optional
-from http.cookiejar import Cookie
-from datetime import datetime, timezone
-
-import httpx
+"""grade-checker entry point.
 
-from database import Database
-from parsing import parse_grades
-from webhook import send_webhook
+    python main.py                       sync forever (the Docker default)
+    python main.py --once [--account LOGIN] [--semester N ...] [--dry-run]
 
+`--once` runs a single sync for each account and exits with 0 when nothing
+changed, 1 when grades changed and 2 on errors, so cron jobs can branch on it.
 
-LOGIN_URL = (
-    f"{os.getenv('OASIS_BASE_URL', 'https://polytech-saclay.oasis.aouka.org')}/prod/bo/core/Router/Ajax/ajax.php"
-    "?targetProject=oasis_polytech_paris"
-    "&route=BO\\Connection\\User::login"
-)
+Modules are imported inside the functions that need them: a one-shot run
+doesn't pay for the metrics/API servers, the scheduler or the webhook
+dispatcher before its first request.
+"""
 
-SEMESTER_URL = (
-    f"{os.getenv('OASIS_BASE_URL', 'https://polytech-saclay.oasis.aouka.org')}/prod/bo/core/Router/Ajax/ajax.php"
-    "?targetProject=oasis_polytech_paris"
-    "&route=Oasis\\Common\\Model\\Cursus\\StudentCursus\\StudentCursus::reload_semester"
-)
+import os
+import sys
+import argparse
+import asyncio
 
-# Set this to the cookie name that contains the token (e.g. "token", "jwt", etc.)
-TOKEN_COOKIE_NAME = os.environ.get(
-    "OASIS_TOKEN_COOKIE_NAME",
-    "bo_oasis_polytech_parisSession",
-)
-CURRENT_YEAR_COOKIE = os.environ.get(
-    "OASIS_CURRENT_YEAR_COOKIE",
-    "bo_oasis_polytech_parisyear",
-)
 
 DB_PATH = os.environ.get("DB_PATH", "grades.db")
 SYNC_INTERVAL_SECONDS = int(os.environ.get("SYNC_INTERVAL_SECONDS", "3600"))
-
-def _iter_cookiejar(cookies: httpx.Cookies):
-    # httpx stores cookies in an underlying http.cookiejar.CookieJar.
-    # Iterating the jar yields http.cookiejar.Cookie objects.
-    return cookies.jar
-
-
-def _get_cookie(session: httpx.AsyncClient, name: str) -> Optional[Cookie]:
-    for c in _iter_cookiejar(session.cookies):
-        if c.name == name:
-            return c
-    return None
-
-
-def _is_expired(cookie: Cookie, skew_seconds: int = 30) -> bool:
-    # If cookie.expires is None => session cookie; treat as not-expired here.
-    if cookie.expires is None:
-        return False
-    return cookie.expires <= int(time.time()) + skew_seconds
-
-
-async def _login(session: httpx.AsyncClient, login: str, password: str) -> None:
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "fr-FR,fr;q=0.8",
-        "Connection": "keep-alive",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Origin": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org"),
-        "Referer": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org") + "/?",
-    }
-    data = {"login": login, "password": password, "url": ""}
-
-    resp = await session.post(LOGIN_URL, headers=headers, data=data)
-    print(f"Login response: {resp.status_code}")
-    resp.raise_for_status()
-    # session.cookies is now updated in-memory if server returned Set-Cookie
-
-
-async def ensure_valid_session(session: httpx.AsyncClient, login: str, password: str) -> None:
-    token_cookie = _get_cookie(session, TOKEN_COOKIE_NAME)
-    current_year_cookie = _get_cookie(session, CURRENT_YEAR_COOKIE)
-
-    if (
-        token_cookie is None
-        or _is_expired(token_cookie)
-        or current_year_cookie is None
-        or _is_expired(current_year_cookie)
-    ):
-        await _login(session, login, password)
-
-
-async def _post_with_retry_on_auth(
-    session: httpx.AsyncClient,
-    url: str,
-    *,
-    headers: dict[str, str],
-    data: dict[str, str],
-    login: str,
-    password: str,
-) -> httpx.Response:
-    """POST and if auth fails (401/403), re-login and retry once."""
-    await ensure_valid_session(session, login, password)
-    resp = await session.post(url, headers=headers, data=data)
-    if resp.status_code in (401, 403):
-        await _login(session, login, password)
-        resp = await session.post(url, headers=headers, data=data)
-    resp.raise_for_status()
-    return resp
-
-
-def _extract_html(resp: httpx.Response) -> str:
-    content_type = resp.headers.get("content-type", "")
-    if "application/json" in content_type:
-        payload = resp.json()
-        if isinstance(payload, dict):
-            for key in ("html", "content", "data", "result"):
-                value = payload.get(key)
-                if isinstance(value, str):
-                    return value
-        # Fallback to stringified JSON
-        return resp.text
-    return resp.text
-
-
-def _get_year_value(session: httpx.AsyncClient) -> str:
-    cookie = _get_cookie(session, CURRENT_YEAR_COOKIE)
-    if cookie is not None and getattr(cookie, "value", ""):
-        return str(cookie.value)
-    # Allow overriding explicitly.
-    return os.environ.get("OASIS_YEAR", CURRENT_YEAR_COOKIE)
-
-
-async def _fetch_semester_html(
-    session: httpx.AsyncClient,
-    *,
-    student: str,
-    year_value: str,
-    semester_in_year: int,
-    tab: str,
-    login: str,
-    password: str,
-) -> str:
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "fr-FR,fr;q=0.8",
-        "Connection": "keep-alive",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Origin": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org"),
-        "Referer": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org") + "/?",
-    }
-    data = {
-        "student": student,
-        "year": year_value,
-        "semester_in_year": str(semester_in_year),
-        "tab": tab,
-    }
-
-    resp = await _post_with_retry_on_auth(
-        session,
-        SEMESTER_URL,
-        headers=headers,
-        data=data,
-        login=login,
-        password=password,
-    )
-    return _extract_html(resp)
-
-
-async def _sync_grades_for_semester(
-    db: Database,
-    *,
-    student: str,
-    year: int,
-    semester: int,
-    grades,
-) -> tuple[int, int, list[str]]:
-    """Returns (new_count, updated_count, details)."""
-    new_count = 0
-    updated_count = 0
-    details: list[str] = []
-
-    for grade in grades:
-        existing = await db.get_grade_by_key(
-            student=student,
-            year=year,
-            semester=semester,
-            module_code=grade.module_code,
-            name=grade.name,
-            date=grade.date,
-        )
-
-        if not existing:
-            new_count += 1
-            details.append(
-                f"NEW S{semester} {grade.module_code} | {grade.name} | {grade.date} | {grade.avg_note}"
-            )
-        else:
-            _id, old_note, old_avg, old_rank, old_app = existing[0]
-            if (
-                (old_note or "") != (grade.note or "")
-                or (old_avg or "") != (grade.avg_note or "")
-                or (old_rank or "") != (grade.rank or "")
-                or (old_app or "") != (grade.appreciation or "")
-            ):
-                updated_count += 1
-                details.append(
-                    f"UPD S{semester} {grade.module_code} | {grade.name} | {grade.date} | {old_avg}->{grade.avg_note}"
+# Share the accounts with other processes through leases in the database (see workers.py).
+WORKER_MODE = os.environ.get("WORKER_MODE", "") not in ("", "0", "false")
+
+EXIT_UNCHANGED = 0
+EXIT_CHANGED = 1
+EXIT_FAILED = 2
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Poll OASIS for new grades.")
+    parser.add_argument("--once", action="store_true", help="sync once and exit (0: no changes, 1: changes, 2: errors)")
+    parser.add_argument("--account", help="only sync this login")
+    parser.add_argument("--semester", type=int, action="append", choices=(1, 2), help="only sync this semester (repeatable; --once only)")
+    parser.add_argument("--dry-run", action="store_true", help="detect and print changes without storing or sending them (--once only)")
+    args = parser.parse_args(argv)
+    if not args.once and (args.semester or args.dry_run):
+        parser.error("--semester and --dry-run require --once")
+    return args
+
+
+async def run_once(accounts, *, semesters: tuple[int, ...] | None, dry_run: bool) -> int:
+    """One sync_once per account, concurrently; returns the process exit code."""
+    from database import Database
+    from parsing import shutdown_parse_executor
+    from sync import SEMESTERS, oasis_clients, sync_once
+
+    async with Database(DB_PATH) as db:
+        # A single PRAGMA read when the schema is already current.
+        await db.create_tables()
+        try:
+            # A dry run leaves the session store (and its key file) alone entirely.
+            async with oasis_clients(db, persist_sessions=not dry_run) as clients:
+                sessions = [await clients.open(account.login) for account in accounts]
+                results = await asyncio.gather(
+                    *(
+                        sync_once(
+                            session=session,
+                            db=db,
+                            login=account.login,
+                            password=account.password,
+                            semesters=semesters or SEMESTERS,
+                            dry_run=dry_run,
+                        )
+                        for account, session in zip(accounts, sessions)
+                    ),
+                    return_exceptions=True,
                 )
-
-        await db.upsert_grade(
-            student=student,
-            year=year,
-            semester=semester,
-            module_code=grade.module_code,
-            name=grade.name,
-            date=grade.date,
-            note=grade.note,
-            avg_note=grade.avg_note,
-            rank=grade.rank,
-            appreciation=grade.appreciation,
-        )
-
-    return new_count, updated_count, details
-
-
-async def sync_once(*, session: httpx.AsyncClient, db: Database, login: str, password: str) -> None:
-    await ensure_valid_session(session, login, password)
-
-    # Resolve year from cookie when possible.
-    year_value = _get_year_value(session)
+        finally:
+            shutdown_parse_executor()
+
+    changed = failed = False
+    for account, result in zip(accounts, results):
+        if isinstance(result, BaseException):
+            failed = True
+            print(f"[{account.login}] Sync failed: {result!r}")
+        elif any(result.values()):
+            changed = True
+    if failed:
+        return EXIT_FAILED
+    return EXIT_CHANGED if changed else EXIT_UNCHANGED
+
+
+async def run_forever(accounts) -> None:
+    from api import API_PORT, start_api_server
+    from database import Database
+    from metrics import start_metrics_server
+    from parsing import shutdown_parse_executor
+    from profiling import start_loop_lag_sampler
+    from webhook import start_webhook_dispatcher, stop_webhook_dispatcher
+
+    metrics_server = await start_metrics_server()
+    lag_sampler = start_loop_lag_sampler()
+    await start_webhook_dispatcher()
     try:
-        year_int = int(year_value)
-    except ValueError:
-        # If the server expects a non-numeric value, we still pass it along,
-        # but use the current calendar year for DB bucketing.
-        year_int = datetime.now(timezone.utc).year
-
-    total_new = 0
-    total_updated = 0
-    all_details: list[str] = []
-
-    # Fetch and sync semesters 1 and 2.
-    for semester in (1, 2):
-        html = await _fetch_semester_html(
-            session,
-            student=login,
-            year_value=year_value,
-            semester_in_year=semester,
-            tab="Courses",
-            login=login,
-            password=password,
-        )
-        grades = parse_grades(html)
-        new_count, updated_count, details = await _sync_grades_for_semester(
-            db,
-            student=login,
-            year=year_int,
-            semester=semester,
-            grades=grades,
-        )
-        total_new += new_count
-        total_updated += updated_count
-        all_details.extend(details)
-
-    if total_new or total_updated:
-        max_lines = int(os.environ.get("WEBHOOK_MAX_LINES", "30"))
-        lines = [
-            f"New: {total_new} | Updated: {total_updated}",
-        ]
-        lines.extend(all_details[:max_lines])
-        if len(all_details) > max_lines:
-            lines.append(f"…and {len(all_details) - max_lines} more")
-        await send_webhook("\n".join(lines))
-    else:
-        print("No grade changes detected.")
-
-
-async def main() -> None:
-    login = os.environ.get("OASIS_LOGIN", "")
-    password = os.environ.get("OASIS_PASSWORD", "")
-    if not login or not password:
-        raise SystemExit("Set OASIS_LOGIN and OASIS_PASSWORD env vars.")
-
-    db = Database(DB_PATH)
-    await db.create_tables()
-
-    timeout = httpx.Timeout(30.0)
-    async with httpx.AsyncClient(timeout=timeout) as session:
-        print(f"Starting grade sync loop; interval={SYNC_INTERVAL_SECONDS}s")
-
-        next_run = time.monotonic()
-        while True:
-            now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        async with Database(DB_PATH) as db:
+            await db.create_tables()
+            # The API's response cache only sees this process's syncs; with
+            # workers sharing the accounts it would serve stale data.
+            if WORKER_MODE and API_PORT:
+                print("API_PORT is ignored in worker mode")
+                api_server = None
+            else:
+                api_server = await start_api_server(db)
             try:
-                print(f"[{now}] Sync starting")
-                await sync_once(session=session, db=db, login=login, password=password)
-                print(f"[{now}] Sync done")
-            except asyncio.CancelledError:
-                raise
-            except Exception as exc:
-                print(f"[{now}] Sync failed: {exc!r}")
-
-            next_run += SYNC_INTERVAL_SECONDS
-            sleep_for = max(0.0, next_run - time.monotonic())
-            await asyncio.sleep(sleep_for)
+                if WORKER_MODE:
+                    from workers import run_worker
+
+                    await run_worker(accounts, db=db, interval=SYNC_INTERVAL_SECONDS)
+                else:
+                    from scheduler import run_accounts
+
+                    await run_accounts(accounts, db=db, interval=SYNC_INTERVAL_SECONDS)
+            finally:
+                if api_server is not None:
+                    api_server.close()
+    finally:
+        await stop_webhook_dispatcher()
+        if metrics_server is not None:
+            metrics_server.close()
+        if lag_sampler is not None:
+            lag_sampler.cancel()
+        shutdown_parse_executor()
+
+
+async def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+
+    from accounts import load_accounts
+
+    accounts = load_accounts()
+    if not accounts:
+        print("Set OASIS_LOGIN and OASIS_PASSWORD env vars (or ACCOUNTS_FILE).", file=sys.stderr)
+        return EXIT_FAILED
+    if args.account is not None:
+        accounts = [account for account in accounts if account.login == args.account]
+        if not accounts:
+            print(f"No configured account with login {args.account!r}.", file=sys.stderr)
+            return EXIT_FAILED
+
+    if args.once:
+        return await run_once(accounts, semesters=tuple(args.semester or ()), dry_run=args.dry_run)
+    await run_forever(accounts)
+    return EXIT_UNCHANGED
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    raise SystemExit(asyncio.run(main()))
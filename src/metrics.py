@@ -0,0 +1,148 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Enable the endpoint with `METRICS_PORT` (e.g. 9100); it serves `GET /metrics`
+on `METRICS_HOST`, 127.0.0.1 by default. The Docker image sets 0.0.0.0 so a
+published port reaches it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from httpserver import Response, serve
+
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[LabelKey, float] = {}
+        _REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = _DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts incl. +Inf, sum)
+        self._series: dict[LabelKey, tuple[list[int], list[float]]] = {}
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        series = self._series.get(_label_key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+_REGISTRY: list[Counter | Histogram] = []
+
+PHASE_SECONDS = Histogram(
+    "grade_sync_phase_seconds",
+    "Time spent per sync phase (login, fetch, parse, db, webhook, cycle).",
+)
+LOOP_LAG_SECONDS = Histogram(
+    "grade_sync_loop_lag_seconds",
+    "How late the event loop woke the lag sampler: at least that long blocked (only sampled with PROFILE_DIR set).",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+OASIS_RESPONSE_BYTES = Counter("grade_sync_oasis_response_bytes_total", "Response body bytes received from OASIS.")
+OASIS_REQUEST_BYTES = Counter("grade_sync_oasis_request_bytes_total", "Request body bytes sent to OASIS.")
+ROWS_EXAMINED = Counter("grade_sync_rows_examined_total", "Grade rows compared against the database.")
+ROWS_CHANGED = Counter("grade_sync_rows_changed_total", "Grade rows written because they were new or changed.")
+OASIS_RETRIES = Counter("grade_sync_oasis_retries_total", "OASIS requests retried after a timeout, connection error or 5xx.")
+OASIS_BREAKER_OPENS = Counter("grade_sync_oasis_breaker_opens_total", "Times OASIS requests were paused because it looked down.")
+RELOGINS = Counter("grade_sync_relogins_total", "Logins forced by a 401/403 from OASIS.")
+PAGE_CACHE = Counter("grade_sync_page_cache_total", "Semester pages skipped as unchanged (hit) or parsed (miss).")
+FAILURES = Counter("grade_sync_failures_total", "Failed account sync cycles.")
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+async def _handle(path: str, query: dict[str, list[str]], headers: dict[str, str]) -> Response:
+    if path != "/metrics":
+        return 404, {}, b""
+    return 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}, render().encode("utf-8")
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> asyncio.Server | None:
+    """Serve /metrics in the background; returns None when METRICS_PORT is unset."""
+    if not port:
+        return None
+    server = await serve(_handle, host, port)
+    print(f"Metrics available on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,29 @@
+import re
+
+# OASIS renders numbers French-style ("17,730"), ranks as "3/45", and uses
+# dashes for anything not graded yet.
+_RANK_RE = re.compile(r"^\s*(\d+)\s*(?:/\s*(\d+))?\s*$")
+
+
+def parse_note(value: str | None) -> float | None:
+    """"17,730" -> 17.73; placeholders ("—", "ABS", "") -> None."""
+    if not value:
+        return None
+    try:
+        return float(value.replace("\xa0", "").replace(" ", "").replace(",", "."))
+    except ValueError:
+        return None
+
+
+def parse_rank(value: str | None) -> tuple[int | None, int | None]:
+    """"3/45" -> (3, 45); "3" -> (3, None); placeholders -> (None, None)."""
+    match = _RANK_RE.match(value or "")
+    if match is None:
+        return None, None
+    position, size = match.groups()
+    return int(position), (int(size) if size is not None else None)
+
+
+def grade_numbers(note: str | None, avg_note: str | None, rank: str | None) -> tuple[float | None, float | None, int | None, int | None]:
+    """(note_value, avg_value, rank_pos, rank_size) as stored next to the text columns."""
+    return (parse_note(note), parse_note(avg_note), *parse_rank(rank))
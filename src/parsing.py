@@ -1,6 +1,47 @@
-from bs4 import BeautifulSoup
+import os
+import re
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html.entities import html5
+from html.parser import HTMLParser
 
 from Models.Grade import Grade
+from Models.Module import Module
+from Models.Semester import Semester
+from Models.UE import UE
+
+
+# "stream" is a single-pass html.parser.HTMLParser that only tracks the tables
+# we read; "bs4" builds the full BeautifulSoup tree and is kept as the reference
+# (tests/test_parsing.py holds the two to identical output).
+PARSER_ENGINE = os.environ.get("PARSER_ENGINE", "stream")
+
+# Where parse_semester_async runs: "inline" (on the event loop, fine for a few
+# accounts), "thread" or "process" (a pool of PARSE_WORKERS, default one per core).
+PARSE_EXECUTOR = os.environ.get("PARSE_EXECUTOR", "inline")
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0")) or None
+
+# Semester pages hold one table family per kind of row, told apart by id prefix
+# (e.g. "Tests12025" for the "Épreuves" table).
+TESTS_TABLE_PREFIX = "Tests"
+MODULES_TABLE_PREFIX = "Courses"
+UES_TABLE_PREFIX = "UEs"
+_TABLE_PREFIXES = (TESTS_TABLE_PREFIX, MODULES_TABLE_PREFIX, UES_TABLE_PREFIX)
+
+AVERAGE_CLASS = "semesterAverage"
+
+# The cursus view lists the student's years in a <select> whose id or name
+# contains one of these; option values are the year as OASIS expects it back
+# (e.g. "2024"), other options (placeholders) are ignored.
+YEAR_SELECT_MARKERS = ("year", "annee")
+_YEAR_VALUE = re.compile(r"^((?:19|20)[0-9]{2})$")
+
+# Elements BeautifulSoup treats as void: they never go on the open-element stack.
+_VOID_ELEMENTS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr",
+    "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid",
+    "param", "source", "spacer", "track", "wbr",
+})
 
 
 def _clean_text(value: str) -> str:
@@ -19,48 +60,434 @@ def _cell_text(cell) -> str:
     return _clean_text(cell.get_text(" ", strip=True))
 
 
-def parse_grades(html_content: str) -> list[Grade]:
+def _to_float(value: str) -> float:
+    """Parse a French-formatted number ("2,5"); placeholders count as 0."""
+    try:
+        return float(value.replace(",", ".").replace(" ", ""))
+    except ValueError:
+        return 0.0
+
+
+def _bs4_tables(html_content: str) -> tuple[dict[str, list[list[str]]], str]:
+    # Imported on first use: the default stream engine doesn't need bs4, and it
+    # is the slowest import at startup.
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_content, "html.parser")
 
+    tables: dict[str, list[list[str]]] = {prefix: [] for prefix in _TABLE_PREFIXES}
+    for prefix, rows in tables.items():
+        for table in soup.select(f'table[id^="{prefix}"]'):
+            for row in table.select("tbody tr"):
+                rows.append([_cell_text(cell) for cell in row.find_all("td")])
+
+    avg = soup.select_one(f".{AVERAGE_CLASS}")
+    average = "—" if avg is None else _cell_text(avg)
+    return tables, average
+
+
+def _entity_table() -> dict[str, str]:
+    # Same lookup as bs4: every HTML5 name, with or without its semicolon.
+    table: dict[str, str] = {}
+    for name, character in sorted(html5.items()):
+        table.setdefault(name.removesuffix(";"), character)
+    return table
+
+
+_ENTITIES = _entity_table()
+_DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+
+def _charref_text(name: str) -> str:
+    """Text for `&#<name>;` the way bs4 resolves it (HTML spec, plus trailing junk kept)."""
+    base, pattern = 10, _DECIMAL_REFERENCE
+    if name[:1] in ("x", "X"):
+        name, base, pattern = name[1:], 16, _HEX_REFERENCE
+    extra = ""
+    try:
+        number = int(name, base)
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return name
+        number, extra = int(match[1], base), match[2]
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd" + extra
+    if 0x80 <= number <= 0x9F:
+        # C1 controls are taken as their Windows-1252 characters where one exists.
+        try:
+            return bytes([number]).decode("cp1252") + extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number) + extra
+
+
+# Text inside these elements is its own kind of string in bs4 and left out of
+# any other element's get_text(); the element itself reads only that kind.
+_STRING_CONTAINERS = frozenset({"rt", "rp", "style", "script", "template"})
+_CDATA = "<cdata>"
+
+
+class _Text:
+    """Text collected for one element: its stripped strings of the kinds it reads."""
+
+    __slots__ = ("parts", "kinds")
+
+    def __init__(self, tag: str) -> None:
+        self.parts: list[str] = []
+        self.kinds = frozenset({tag}) if tag in _STRING_CONTAINERS else frozenset({None, _CDATA})
+
+
+class _Table:
+    __slots__ = ("prefix", "rows")
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.rows: list[list[_Text]] = []
+
+
+class _SemesterParser(HTMLParser):
+    """Collects `table[id^=<prefix>] tbody tr` cell texts and the semester average in one pass.
+
+    Follows bs4's html.parser tree builder event for event, so the result is
+    what `_bs4_tables` reads off the tree: an end tag closes the most recent
+    open element of that name (and anything opened after it), stray end tags
+    are ignored, void elements close at once and a later `</br>` for them is
+    swallowed, character references resolve as bs4 resolves them, and string
+    containers (script, style, template, rt, rp) keep their text to themselves.
+    """
+
+    def __init__(self) -> None:
+        # bs4 resolves references itself; receiving them as events lets us do the same.
+        super().__init__(convert_charrefs=False)
+        self.tables: list[_Table] = []  # every matching table, in document order
+        self.average: _Text | None = None
+        # (tag, table, row or cell it opened, whether it opened the average)
+        self._stack: list[tuple[str, _Table | list | _Text | None, bool]] = []
+        self._open_tables: list[_Table] = []
+        self._tbody_depth = 0  # open tbody elements anywhere, like the "tbody tr" ancestor check
+        self._containers: list[str] = []
+        self._open_rows: list[list[_Text]] = []
+        self._open_texts: list[_Text] = []
+        self._closed_void: list[str] = []
+        self._pending: list[str] = []
+
+    def _flush(self, kind: str | None = None) -> None:
+        # Adjacent data events form one string, like BeautifulSoup's endData().
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+        if kind is None and self._containers:
+            kind = self._containers[-1]
+        for buffer in self._open_texts:
+            if kind in buffer.kinds:
+                buffer.parts.append(text)
+
+    def _start(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._flush()
+        # Repeated attributes: the last one wins, as in bs4.
+        attributes = {name: value or "" for name, value in attrs}
+
+        state: _Table | list | _Text | None = None
+        if tag == "table":
+            prefix = next((p for p in _TABLE_PREFIXES if attributes.get("id", "").startswith(p)), None)
+            if prefix is not None:
+                state = _Table(prefix)
+                self.tables.append(state)
+                self._open_tables.append(state)
+        elif tag == "tbody":
+            self._tbody_depth += 1
+        elif tag == "tr":
+            if self._open_tables and self._tbody_depth:
+                state = []
+                # Each enclosing matching table selects the row, like bs4's per-table select.
+                for table in self._open_tables:
+                    table.rows.append(state)
+                self._open_rows.append(state)
+        elif tag == "td":
+            if self._open_rows:
+                state = _Text(tag)
+                for row in self._open_rows:
+                    row.append(state)
+                self._open_texts.append(state)
+        if tag in _STRING_CONTAINERS:
+            self._containers.append(tag)
+
+        is_average = False
+        if self.average is None and AVERAGE_CLASS in attributes.get("class", "").split():
+            is_average = True
+            self.average = _Text(tag)
+            self._open_texts.append(self.average)
+
+        self._stack.append((tag, state, is_average))
+
+    def _end(self, tag: str) -> None:
+        self._flush()
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._stack) > index:
+            name, state, is_average = self._stack.pop()
+            if name == "tbody":
+                self._tbody_depth -= 1
+            if name in _STRING_CONTAINERS:
+                self._containers.pop()
+            # Elements close in reverse opening order, so their buffers are on top.
+            if is_average:
+                self._open_texts.pop()
+            if isinstance(state, _Table):
+                self._open_tables.pop()
+            elif isinstance(state, list):
+                self._open_rows.pop()
+            elif isinstance(state, _Text):
+                self._open_texts.pop()
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._start(tag, attrs)
+        if tag in _VOID_ELEMENTS:
+            self._end(tag)
+            # A matching end tag may still follow; it must not split the text around it.
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._start(tag, attrs)
+        self._end(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self._pending.append(data)
+
+    def handle_charref(self, name: str) -> None:
+        self._pending.append(_charref_text(name))
+
+    def handle_entityref(self, name: str) -> None:
+        self._pending.append(_ENTITIES.get(name, "&" + name))
+
+    def _string(self, data: str, kind: str | None) -> None:
+        # Comments, declarations and processing instructions are separate
+        # strings that no element's text includes; CDATA sections are read.
+        self._flush()
+        self._pending.append(data)
+        if kind is None:
+            self._pending = []
+        else:
+            self._flush(kind)
+
+    def handle_comment(self, data: str) -> None:
+        self._string(data, None)
+
+    def handle_decl(self, decl: str) -> None:
+        self._string(decl, None)
+
+    def handle_pi(self, data: str) -> None:
+        self._string(data, None)
+
+    def unknown_decl(self, data: str) -> None:
+        if data.upper().startswith("CDATA["):
+            self._string(data[len("CDATA["):], _CDATA)
+        else:
+            self._string(data, None)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+
+def _stream_tables(html_content: str) -> tuple[dict[str, list[list[str]]], str]:
+    parser = _SemesterParser()
+    parser.feed(html_content)
+    parser.close()
+    tables: dict[str, list[list[str]]] = {prefix: [] for prefix in _TABLE_PREFIXES}
+    for table in parser.tables:
+        tables[table.prefix].extend([_clean_text(" ".join(cell.parts)) for cell in row] for row in table.rows)
+    average = "—" if parser.average is None else _clean_text(" ".join(parser.average.parts))
+    return tables, average
+
+
+_ENGINES = {
+    "bs4": _bs4_tables,
+    "stream": _stream_tables,
+}
+
+
+def _extract_tables(html_content: str, engine: str | None) -> tuple[dict[str, list[list[str]]], str]:
+    engine = engine or PARSER_ENGINE
+    try:
+        extract = _ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown parser engine {engine!r} (expected one of {sorted(_ENGINES)})") from None
+    return extract(html_content)
+
+
+def _grades_from_rows(rows: list[list[str]]) -> list[Grade]:
     grades: list[Grade] = []
+    for cells in rows:
+        if len(cells) < 7:
+            continue
 
-    # The "Épreuves" table(s) usually have an id like "Tests12025".
-    for table in soup.select('table[id^="Tests"]'):
-        for row in table.select("tbody tr"):
-            cells = row.find_all("td")
-            if len(cells) < 7:
-                continue
-
-            module_div = cells[0].select_one("div.courseLine")
-            module_code = _clean_text(module_div.get("data-code", "")) if module_div else ""
-
-            module_code = _cell_text(cells[0])
-            name = _cell_text(cells[1])
-            date = _cell_text(cells[2])
-            note = _cell_text(cells[3])
-            avg_note = _cell_text(cells[4])
-            rank = _cell_text(cells[5])
-            appreciation = _cell_text(cells[6])
-
-            grades.append(
-                Grade(
-                    module_code=module_code,
-                    name=name,
-                    date=date,
-                    note=note,
-                    avg_note=avg_note,
-                    rank=rank,
-                    appreciation=appreciation,
-                )
-            )
+        module_code, name, date, note, avg_note, rank, appreciation = cells[:7]
 
+        grades.append(
+            Grade(
+                module_code=module_code,
+                name=name,
+                date=date,
+                note=note,
+                avg_note=avg_note,
+                rank=rank,
+                appreciation=appreciation,
+            )
+        )
     return grades
 
 
-def parse_semester_average(html_content: str) -> str:
+def _modules_from_rows(rows: list[list[str]]) -> list[Module]:
+    modules: list[Module] = []
+    for cells in rows:
+        if len(cells) < 9:
+            continue
+
+        module_code, ue_code, title_fr, coef, bloc_code, note, avg_note, rank, ec = cells[:9]
+
+        modules.append(
+            Module(
+                module_code=module_code,
+                ue_code=ue_code,
+                title_fr=title_fr,
+                coef=_to_float(coef),
+                bloc_code=bloc_code,
+                note=note,
+                avg_note=avg_note,
+                rank=rank,
+                ec=ec,
+            )
+        )
+    return modules
+
+
+def _ues_from_rows(rows: list[list[str]]) -> list[UE]:
+    ues: list[UE] = []
+    for cells in rows:
+        if len(cells) < 7:
+            continue
+
+        ue_code, title_fr, ects, note, avg_note, rank, resultat = cells[:7]
+
+        ues.append(
+            UE(
+                ue_code=ue_code,
+                title_fr=title_fr,
+                ects=_to_float(ects),
+                note=note,
+                avg_note=avg_note,
+                rank=rank,
+                resultat=resultat,
+            )
+        )
+    return ues
+
+
+def _semester_from_tables(tables: dict[str, list[list[str]]], average: str) -> Semester:
+    return Semester(
+        grades=_grades_from_rows(tables[TESTS_TABLE_PREFIX]),
+        modules=_modules_from_rows(tables[MODULES_TABLE_PREFIX]),
+        ues=_ues_from_rows(tables[UES_TABLE_PREFIX]),
+        average=average,
+    )
+
+
+def parse_semester(html_content: str, engine: str | None = None) -> Semester:
+    """Extract grades, modules, UEs and the semester average from a single parse."""
+    return _semester_from_tables(*_extract_tables(html_content, engine))
+
+
+_executor: Executor | None = None
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if PARSE_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        elif PARSE_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+        else:
+            raise ValueError(f"Unknown PARSE_EXECUTOR {PARSE_EXECUTOR!r} (expected inline, thread or process)")
+    return _executor
+
+
+async def parse_semester_async(html_content: str, engine: str | None = None) -> Semester:
+    """Like parse_semester, but off the event loop unless PARSE_EXECUTOR is "inline".
+
+    Only the raw HTML is sent to the pool and only plain cell-text rows come
+    back; model objects are built here, so nothing heavy crosses processes.
+    """
+    if PARSE_EXECUTOR == "inline":
+        return parse_semester(html_content, engine)
+
+    loop = asyncio.get_running_loop()
+    # Resolve the engine here so pool workers don't depend on their own environment.
+    tables, average = await loop.run_in_executor(
+        _get_executor(), _extract_tables, html_content, engine or PARSER_ENGINE
+    )
+    return _semester_from_tables(tables, average)
+
+
+def shutdown_parse_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+class _YearOptionParser(HTMLParser):
+    """Collects the <option> values of year selectors (a <select> whose id or name mentions the year)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.years: set[int] = set()
+        self._in_year_select = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attributes = {name: value or "" for name, value in attrs}
+        if tag == "select":
+            label = f"{attributes.get('id', '')} {attributes.get('name', '')}".lower()
+            self._in_year_select = any(marker in label for marker in YEAR_SELECT_MARKERS)
+        elif tag == "option" and self._in_year_select:
+            match = _YEAR_VALUE.match(attributes.get("value", "").strip())
+            if match:
+                self.years.add(int(match.group(1)))
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "select":
+            self._in_year_select = False
+
+
+def parse_available_years(html_content: str) -> list[int]:
+    """Years offered by the page's year selector, newest first; empty when it has none."""
+    parser = _YearOptionParser()
+    parser.feed(html_content)
+    parser.close()
+    return sorted(parser.years, reverse=True)
+
+
+def parse_grades(html_content: str, engine: str | None = None) -> list[Grade]:
+    return parse_semester(html_content, engine).grades
+
+
+def parse_semester_average(html_content: str, engine: str | None = None) -> str:
     """Extract the displayed semester average (e.g. '17,730') from the semester HTML."""
-    soup = BeautifulSoup(html_content, "html.parser")
-    avg = soup.select_one(".semesterAverage")
-    if avg is None:
-        return "—"
-    return _clean_text(avg.get_text(" ", strip=True))
\ No newline at end of file
+    return parse_semester(html_content, engine).average
@@ -0,0 +1,154 @@
+"""Opt-in profiling of sync cycles.
+
+Set PROFILE_DIR to turn it on. Every PROFILE_EVERY-th sync cycle (counted
+across accounts) then runs under cProfile with tracemalloc tracing, and two
+artifacts are written:
+
+    cycle-<time>-<n>-<login>.prof   cProfile stats (open with pstats or snakeviz)
+    cycle-<time>-<n>-<login>.txt    top functions, allocation diff, loop lag
+
+The report is built and written in a worker thread once the cycle is over,
+so it adds neither to the measured cycle nor to the loop lag.
+
+Only the newest PROFILE_KEEP cycles are kept. cProfile sees the whole event
+loop thread, so a profile also contains whatever other accounts ran during
+that cycle. A loop-lag sampler runs alongside and reports (log line and the
+grade_sync_loop_lag_seconds histogram) how late its wakeups ran, a lower
+bound on how long the event loop was blocked (short by at most
+PROFILE_LAG_INTERVAL).
+
+When PROFILE_DIR is unset, `profile_cycle` returns a null context and the
+sampler is not started.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import glob
+import io
+import itertools
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncContextManager, AsyncIterator
+
+from metrics import LOOP_LAG_SECONDS
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+PROFILE_EVERY = max(1, int(os.environ.get("PROFILE_EVERY", "10")))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "20"))
+# Blocks are measured to within one interval, so keep it short.
+PROFILE_LAG_INTERVAL = float(os.environ.get("PROFILE_LAG_INTERVAL", "0.01"))
+# Blocks at least this long are logged.
+PROFILE_LAG_WARN_SECONDS = float(os.environ.get("PROFILE_LAG_WARN_SECONDS", "0.1"))
+
+_TOP_FUNCTIONS = 40
+_TOP_ALLOCATIONS = 25
+
+_cycles = itertools.count(1)
+_active = False
+# Latest sampler wakeup seen since the current profile started (a lower bound on the longest block).
+_max_lag = 0.0
+
+
+def profile_cycle(label: str) -> AsyncContextManager[None]:
+    """Wrap one sync cycle (`async with`); profiles it when profiling is on and its turn has come."""
+    if not PROFILE_DIR:
+        return nullcontext()
+    number = next(_cycles)
+    # cProfile can't nest, so a cycle overlapping a profiled one is skipped.
+    if number % PROFILE_EVERY or _active:
+        return nullcontext()
+    return _profiled(number, label)
+
+
+@asynccontextmanager
+async def _profiled(number: int, label: str) -> AsyncIterator[None]:
+    global _active, _max_lag
+    _active = True
+    _max_lag = 0.0
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+        _active = False
+        try:
+            # pstats sorting, the snapshot diff and file I/O stay off the event loop.
+            await asyncio.to_thread(_write_artifacts, number, label, profiler, before, after, elapsed, _max_lag)
+        except OSError as exc:
+            print(f"Could not write profile for cycle {number}: {exc!r}")
+
+
+def _write_artifacts(
+    number: int,
+    label: str,
+    profiler: cProfile.Profile,
+    before: tracemalloc.Snapshot,
+    after: tracemalloc.Snapshot,
+    elapsed: float,
+    max_lag: float,
+) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_label = "".join(c if c.isalnum() or c in "-_." else "_" for c in label)
+    stem = os.path.join(PROFILE_DIR, f"cycle-{time.strftime('%Y%m%dT%H%M%S')}-{number:06d}-{safe_label}")
+
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(stem + ".prof")
+
+    report = io.StringIO()
+    report.write(f"cycle {number} [{label}]: {elapsed:.3f}s, event loop blocked for at least {max_lag * 1000:.1f}ms\n\n")
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(_TOP_FUNCTIONS)
+    report.write(f"\nTop {_TOP_ALLOCATIONS} allocation changes during the cycle:\n")
+    for diff in after.compare_to(before, "lineno")[:_TOP_ALLOCATIONS]:
+        report.write(f"{diff}\n")
+    with open(stem + ".txt", "w", encoding="utf-8") as f:
+        f.write(report.getvalue())
+
+    print(f"[{label}] Profiled sync cycle {number} ({elapsed:.2f}s) -> {stem}.txt")
+    _rotate()
+
+
+def _rotate() -> None:
+    # Names start with a sortable timestamp, so the oldest cycles sort first.
+    stems = sorted({path.rsplit(".", 1)[0] for path in glob.glob(os.path.join(PROFILE_DIR, "cycle-*"))})
+    for stem in stems[: max(0, len(stems) - PROFILE_KEEP)]:
+        for path in glob.glob(glob.escape(stem) + ".*"):
+            os.remove(path)
+
+
+async def _sample_loop_lag(interval: float) -> None:
+    global _max_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        deadline = loop.time() + interval
+        await asyncio.sleep(interval)
+        # How late the wakeup ran is time the loop spent on other work without
+        # yielding. A block that began before the deadline is cut short by up
+        # to one interval, so this is a lower bound.
+        lag = max(0.0, loop.time() - deadline)
+        LOOP_LAG_SECONDS.observe(lag)
+        _max_lag = max(_max_lag, lag)
+        if lag >= PROFILE_LAG_WARN_SECONDS:
+            print(f"Event loop was blocked for at least {lag * 1000:.0f}ms")
+
+
+def start_loop_lag_sampler() -> asyncio.Task | None:
+    """Sample event loop lag in the background; None when profiling is off."""
+    if not PROFILE_DIR:
+        return None
+    print(f"Profiling every {PROFILE_EVERY} sync cycle(s) into {PROFILE_DIR}")
+    return asyncio.create_task(_sample_loop_lag(PROFILE_LAG_INTERVAL), name="loop-lag")
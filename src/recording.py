@@ -0,0 +1,192 @@
+"""Record OASIS exchanges to disk and replay them without the network.
+
+Set OASIS_RECORD_DIR to capture every request the OASIS transport sends,
+or OASIS_REPLAY_DIR to answer requests from such a capture instead of OASIS
+(OASIS_REPLAY_LATENCY scales the recorded response times; 0 replays at full
+speed).
+
+Layout of a store directory:
+
+    index.jsonl          one line per exchange, in the order they happened
+    objects/ab/abcd….gz  response bodies, gzip-compressed, named by sha256
+
+Bodies are content-addressed, so months of polling an unchanged page cost one
+object. Passwords are dropped from the recorded request, and session cookie
+values in responses are replaced with a placeholder; only the year cookie is
+kept because sync reads it.
+
+Replay serves the recordings of each distinct request (method, URL and form
+fields other than the password) in their original order and keeps repeating
+the last one, so a replayed sync walks through the captured history.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Iterator
+from urllib.parse import parse_qsl
+
+import httpx
+
+OASIS_RECORD_DIR = os.environ.get("OASIS_RECORD_DIR", "")
+OASIS_REPLAY_DIR = os.environ.get("OASIS_REPLAY_DIR", "")
+OASIS_REPLAY_LATENCY = float(os.environ.get("OASIS_REPLAY_LATENCY", "0"))
+# Cookie values kept as-is; every other Set-Cookie value is redacted.
+OASIS_RECORD_KEEP_COOKIES = frozenset(
+    os.environ.get("OASIS_RECORD_KEEP_COOKIES", os.environ.get("OASIS_CURRENT_YEAR_COOKIE", "bo_oasis_polytech_parisyear")).split(",")
+)
+
+_SECRET_FIELDS = frozenset({"password"})
+_REDACTED = "redacted"
+# The stored body is already decoded and its length is recomputed on replay.
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def _scrub_form(content: bytes) -> dict[str, str]:
+    return {
+        name: value
+        for name, value in parse_qsl(content.decode("utf-8", "replace"), keep_blank_values=True)
+        if name not in _SECRET_FIELDS
+    }
+
+
+def _scrub_set_cookie(value: str) -> str:
+    pair, sep, attributes = value.partition(";")
+    name, _, _cookie_value = pair.partition("=")
+    if name.strip() in OASIS_RECORD_KEEP_COOKIES:
+        return value
+    return f"{name}={_REDACTED}{sep}{attributes}"
+
+
+def _scrub_headers(headers: httpx.Headers) -> list[tuple[str, str]]:
+    scrubbed = []
+    for name, value in headers.multi_items():
+        name = name.lower()
+        if name in _DROPPED_HEADERS:
+            continue
+        if name == "set-cookie":
+            value = _scrub_set_cookie(value)
+        scrubbed.append((name, value))
+    return scrubbed
+
+
+def request_key(method: str, url: str, form: dict[str, str]) -> str:
+    """Identity of a request for replay: method, URL and (scrubbed) form fields."""
+    canonical = json.dumps([method.upper(), url, sorted(form.items())], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseStore:
+    """Content-addressed response bodies plus an append-only exchange index."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + ".gz")
+
+    def put_body(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(gzip.compress(body))
+            os.replace(tmp, path)
+        return digest
+
+    def get_body(self, digest: str) -> bytes:
+        with open(self._object_path(digest), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def append(self, entry: dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def entries(self) -> Iterator[dict[str, Any]]:
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def record(self, request: httpx.Request, response: httpx.Response, elapsed: float) -> None:
+        form = _scrub_form(request.content)
+        self.append({
+            "recorded_at": time.time(),
+            "key": request_key(request.method, str(request.url), form),
+            "method": request.method,
+            "url": str(request.url),
+            "form": form,
+            "status": response.status_code,
+            "headers": _scrub_headers(response.headers),
+            "body": self.put_body(response.content),
+            "elapsed": round(elapsed, 6),
+        })
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through to `inner` and records every completed exchange."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, store: ResponseStore):
+        self.inner = inner
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        await response.aread()
+        elapsed = time.perf_counter() - started
+        # gzip + file writes stay off the event loop.
+        await asyncio.to_thread(self.store.record, request, response, elapsed)
+        return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from a ResponseStore; unknown requests get a 404."""
+
+    def __init__(self, store: ResponseStore, *, latency_scale: float = OASIS_REPLAY_LATENCY):
+        self.store = store
+        self.latency_scale = latency_scale
+        self._exchanges: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for entry in store.entries():
+            self._exchanges[entry["key"]].append(entry)
+        self._served: dict[str, int] = defaultdict(int)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_key(request.method, str(request.url), _scrub_form(request.content))
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            return httpx.Response(404, text=f"No recorded response for {request.method} {request.url}", request=request)
+
+        index = min(self._served[key], len(exchanges) - 1)
+        self._served[key] += 1
+        entry = exchanges[index]
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry["elapsed"] * self.latency_scale)
+        return httpx.Response(
+            entry["status"],
+            headers=[tuple(header) for header in entry["headers"]],
+            content=self.store.get_body(entry["body"]),
+            request=request,
+        )
+
+    @property
+    def recorded(self) -> int:
+        return sum(len(exchanges) for exchanges in self._exchanges.values())
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from accounts import Account
+from database import Database
+from metrics import FAILURES, PHASE_SECONDS
+from profiling import profile_cycle
+from sync import SEMESTERS, oasis_clients, sync_once
+
+# Adaptive polling bounds. After a change a semester is polled every
+# POLL_MIN_SECONDS; each quiet poll stretches its interval by POLL_BACKOFF up
+# to POLL_MAX_SECONDS (POLL_EXAM_MAX_SECONDS during EXAM_PERIODS).
+POLL_MIN_SECONDS = float(os.environ.get("POLL_MIN_SECONDS", "600"))
+POLL_MAX_SECONDS = float(os.environ.get("POLL_MAX_SECONDS", "14400"))
+POLL_EXAM_MAX_SECONDS = float(os.environ.get("POLL_EXAM_MAX_SECONDS", "1800"))
+POLL_BACKOFF = float(os.environ.get("POLL_BACKOFF", "1.5"))
+# Each delay is randomized by +/- this fraction so accounts don't poll in lockstep.
+POLL_JITTER = float(os.environ.get("POLL_JITTER", "0.1"))
+# Semesters due within this window of each other are polled in the same cycle.
+POLL_COALESCE_SECONDS = float(os.environ.get("POLL_COALESCE_SECONDS", "60"))
+# Comma-separated MM-DD:MM-DD ranges (may wrap the new year), e.g. "01-05:02-15,05-20:07-10".
+EXAM_PERIODS = os.environ.get("EXAM_PERIODS", "")
+
+
+def _parse_exam_periods(spec: str) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    periods = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition(":")
+        start_month, start_day = (int(x) for x in start.split("-"))
+        end_month, end_day = (int(x) for x in end.split("-"))
+        periods.append(((start_month, start_day), (end_month, end_day)))
+    return periods
+
+
+class AdaptivePolicy:
+    """Picks the next poll interval of one (account, semester) from its change history."""
+
+    def __init__(
+        self,
+        *,
+        base: float,
+        minimum: float = POLL_MIN_SECONDS,
+        maximum: float = POLL_MAX_SECONDS,
+        exam_maximum: float = POLL_EXAM_MAX_SECONDS,
+        backoff: float = POLL_BACKOFF,
+        jitter: float = POLL_JITTER,
+        exam_periods: str = EXAM_PERIODS,
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.exam_maximum = max(minimum, min(exam_maximum, self.maximum))
+        self.backoff = backoff
+        self.jitter = jitter
+        self.exam_periods = _parse_exam_periods(exam_periods)
+        self.base = min(max(base, minimum), self.maximum)
+
+    def in_exam_period(self, now: datetime | None = None) -> bool:
+        now = now or datetime.now()
+        today = (now.month, now.day)
+        for start, end in self.exam_periods:
+            if start <= end:
+                if start <= today <= end:
+                    return True
+            elif today >= start or today <= end:
+                return True
+        return False
+
+    def next_interval(self, current: float, changed: bool) -> float:
+        """The un-jittered interval to use after a poll that did (not) find changes."""
+        ceiling = self.exam_maximum if self.in_exam_period() else self.maximum
+        if changed:
+            return self.minimum
+        return min(max(current * self.backoff, self.minimum), ceiling)
+
+    def jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+async def _account_loop(
+    account: Account,
+    *,
+    session: httpx.AsyncClient,
+    db: Database,
+    policy: AdaptivePolicy,
+) -> None:
+    # Every semester has its own interval and due time; semesters that are due
+    # together are synced in one sync_once call so they share the login.
+    clock = time.monotonic
+    interval = {semester: policy.base for semester in SEMESTERS}
+    # Spread first polls so a restart doesn't send every account at once.
+    first = clock() + random.uniform(0, policy.jitter * policy.minimum)
+    due = {semester: first for semester in SEMESTERS}
+
+    while True:
+        await asyncio.sleep(max(0.0, min(due.values()) - clock()))
+        started = clock()
+        # Pull semesters that are nearly due into this cycle instead of waking again shortly.
+        semesters = tuple(s for s in SEMESTERS if due[s] <= started + POLL_COALESCE_SECONDS)
+
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        changes: dict[int, int] | None = None
+        try:
+            print(f"[{now}] [{account.login}] Sync starting (semesters {', '.join(map(str, semesters))})")
+            # The profile is written after the cycle timer stops, so it isn't counted in it.
+            async with profile_cycle(account.login):
+                with PHASE_SECONDS.time(phase="cycle"):
+                    changes = await sync_once(
+                        session=session,
+                        db=db,
+                        login=account.login,
+                        password=account.password,
+                        semesters=semesters,
+                    )
+            print(f"[{now}] [{account.login}] Sync done")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # One failing account must not stall the others.
+            FAILURES.inc()
+            print(f"[{now}] [{account.login}] Sync failed: {exc!r}")
+
+        for semester in semesters:
+            # On failure keep the current pace rather than reading it as "no change".
+            if changes is not None:
+                interval[semester] = policy.next_interval(interval[semester], changes.get(semester, 0) > 0)
+            due[semester] = started + policy.jittered(interval[semester])
+        print(
+            f"[{account.login}] Next polls in "
+            + ", ".join(f"S{s}: {round(due[s] - clock())}s" for s in SEMESTERS)
+        )
+
+
+async def run_accounts(accounts: list[Account], *, db: Database, interval: float) -> None:
+    """Sync every account forever, concurrently, on the running event loop.
+
+    `interval` is the starting poll interval; it then adapts per account and semester.
+    """
+    policy = AdaptivePolicy(base=interval)
+    async with oasis_clients(db) as clients:
+        # Reuse sessions saved by a previous run instead of logging every account in again.
+        sessions = [await clients.open(account.login) for account in accounts]
+        if clients.restored:
+            print(f"Restored {clients.restored} saved OASIS session(s)")
+
+        print(
+            f"Starting grade sync loop for {len(accounts)} account(s); "
+            f"interval={policy.base}s, adaptive within [{policy.minimum}s, {policy.maximum}s]"
+        )
+        async with asyncio.TaskGroup() as tg:
+            for account, session in zip(accounts, sessions):
+                tg.create_task(
+                    _account_loop(account, session=session, db=db, policy=policy),
+                    name=f"sync:{account.login}",
+                )
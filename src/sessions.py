@@ -0,0 +1,190 @@
+"""OASIS session cookies: an in-memory expiry index plus encrypted persistence.
+
+The index lets `ensure_valid_session` answer "is this client logged in?"
+without walking the cookie jar, and triggers a re-login
+SESSION_REFRESH_AHEAD_SECONDS before the session cookies expire.
+
+The store keeps the session cookies in the database, encrypted with a local
+Fernet key (SESSION_KEY, or the key file SESSION_KEY_FILE, created on first
+use next to the database), so restarts reuse sessions instead of logging in.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+import weakref
+from http.cookiejar import Cookie
+from typing import Iterable, Optional
+
+import httpx
+
+from database import Database
+
+SESSION_REFRESH_AHEAD_SECONDS = int(os.environ.get("SESSION_REFRESH_AHEAD_SECONDS", "300"))
+
+
+class SessionIndex:
+    """When each client's session expires (inf for browser-session cookies, 0 if missing).
+
+    It also remembers the cookie values it was built from, so callers can
+    tell when OASIS rotated them.
+    """
+
+    def __init__(self) -> None:
+        self._entries: weakref.WeakKeyDictionary[httpx.AsyncClient, tuple[float, tuple]] = weakref.WeakKeyDictionary()
+
+    def update(self, session: httpx.AsyncClient, cookies: Iterable[Optional[Cookie]]) -> bool:
+        """Re-index the client's session cookies; returns whether they differ from the indexed ones."""
+        expires_at = math.inf
+        values = []
+        for cookie in cookies:
+            if cookie is None:
+                expires_at = 0.0
+                values.append(None)
+                continue
+            if cookie.expires is not None:
+                expires_at = min(expires_at, float(cookie.expires))
+            values.append((cookie.value, cookie.expires))
+        entry = (expires_at, tuple(values))
+        changed = self._entries.get(session) != entry
+        self._entries[session] = entry
+        return changed
+
+    def is_fresh(self, session: httpx.AsyncClient) -> bool | None:
+        """True/False once indexed; None when this client was never seen."""
+        entry = self._entries.get(session)
+        if entry is None:
+            return None
+        return entry[0] - SESSION_REFRESH_AHEAD_SECONDS > time.time()
+
+    def forget(self, session: httpx.AsyncClient) -> None:
+        self._entries.pop(session, None)
+
+
+session_index = SessionIndex()
+
+
+def _load_key(db_path: str) -> bytes:
+    key = os.environ.get("SESSION_KEY", "")
+    if key:
+        return key.encode("ascii")
+
+    default_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), "session.key")
+    path = os.environ.get("SESSION_KEY_FILE", default_path)
+    try:
+        with open(path, "rb") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+
+    from cryptography.fernet import Fernet
+
+    key_bytes = Fernet.generate_key()
+    # O_EXCL: if another process created the key meanwhile, use theirs.
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "rb") as f:
+            return f.read().strip()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key_bytes)
+    return key_bytes
+
+
+def _cookie_to_dict(cookie: Cookie) -> dict:
+    return {
+        "name": cookie.name,
+        "value": cookie.value,
+        "domain": cookie.domain,
+        "path": cookie.path,
+        "expires": cookie.expires,
+        "secure": cookie.secure,
+    }
+
+
+def _cookie_from_dict(data: dict) -> Cookie:
+    domain = data.get("domain") or ""
+    return Cookie(
+        version=0,
+        name=data["name"],
+        value=data["value"],
+        port=None,
+        port_specified=False,
+        domain=domain,
+        domain_specified=bool(domain),
+        domain_initial_dot=domain.startswith("."),
+        path=data.get("path") or "/",
+        path_specified=True,
+        secure=bool(data.get("secure")),
+        expires=data.get("expires"),
+        discard=data.get("expires") is None,
+        comment=None,
+        comment_url=None,
+        rest={},
+    )
+
+
+class SessionStore:
+    def __init__(self, db: Database, key: bytes):
+        self.db = db
+        # Imported here: cryptography is only needed once sessions are persisted.
+        from cryptography.fernet import Fernet
+
+        self._fernet = Fernet(key)
+
+    @classmethod
+    def from_env(cls, db: Database) -> "SessionStore":
+        return cls(db, _load_key(db.db_path))
+
+    async def save(self, session: httpx.AsyncClient, student: str, cookie_names: tuple[str, ...]) -> None:
+        cookies = [c for c in session.cookies.jar if c.name in cookie_names]
+        if not cookies:
+            return
+        payload = self._fernet.encrypt(json.dumps([_cookie_to_dict(c) for c in cookies]).encode("utf-8"))
+        expiries = [c.expires for c in cookies if c.expires is not None]
+        await self.db.save_session(student=student, payload=payload, expires_at=min(expiries) if expiries else None)
+
+    async def restore(self, session: httpx.AsyncClient, student: str, cookie_names: tuple[str, ...]) -> bool:
+        """Load a saved, still-valid session into the client's jar; returns whether one was found."""
+        row = await self.db.get_session(student=student)
+        if row is None:
+            return False
+        payload, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            await self.db.delete_session(student=student)
+            return False
+        from cryptography.fernet import InvalidToken
+
+        try:
+            entries = json.loads(self._fernet.decrypt(payload))
+        except InvalidToken:
+            # Key changed or row corrupted: a fresh login will overwrite it.
+            print(f"[{student}] Stored session could not be decrypted; ignoring it")
+            return False
+
+        cookies = {entry["name"]: _cookie_from_dict(entry) for entry in entries if entry.get("name") in cookie_names}
+        for cookie in cookies.values():
+            session.cookies.jar.set_cookie(cookie)
+        session_index.update(session, (cookies.get(name) for name in cookie_names))
+        return bool(session_index.is_fresh(session))
+
+
+_store: SessionStore | None = None
+
+
+def set_session_store(store: SessionStore | None) -> None:
+    global _store
+    _store = store
+
+
+async def persist_session(session: httpx.AsyncClient, student: str, cookie_names: tuple[str, ...]) -> None:
+    """Save the client's session if a store is configured; never fails the caller."""
+    if _store is None:
+        return
+    try:
+        await _store.save(session, student, cookie_names)
+    except Exception as exc:
+        print(f"[{student}] Could not persist session: {exc!r}")
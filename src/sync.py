@@ -0,0 +1,476 @@
+import os
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from http.cookiejar import Cookie
+from datetime import datetime, timezone
+
+import httpx
+
+from api import read_cache
+from database import Database
+from metrics import (
+    OASIS_REQUEST_BYTES,
+    OASIS_RESPONSE_BYTES,
+    PAGE_CACHE,
+    PHASE_SECONDS,
+    RELOGINS,
+    ROWS_CHANGED,
+    ROWS_EXAMINED,
+)
+from Models.Grade import Grade
+from parsing import parse_semester_async
+from sessions import SessionStore, persist_session, session_index, set_session_store
+from transport import OasisTransport, new_oasis_client
+from webhook import send_webhook
+
+
+LOGIN_URL = (
+    f"{os.getenv('OASIS_BASE_URL', 'https://polytech-saclay.oasis.aouka.org')}/prod/bo/core/Router/Ajax/ajax.php"
+    "?targetProject=oasis_polytech_paris"
+    "&route=BO\\Connection\\User::login"
+)
+
+SEMESTER_URL = (
+    f"{os.getenv('OASIS_BASE_URL', 'https://polytech-saclay.oasis.aouka.org')}/prod/bo/core/Router/Ajax/ajax.php"
+    "?targetProject=oasis_polytech_paris"
+    "&route=Oasis\\Common\\Model\\Cursus\\StudentCursus\\StudentCursus::reload_semester"
+)
+
+# Set this to the cookie name that contains the token (e.g. "token", "jwt", etc.)
+TOKEN_COOKIE_NAME = os.environ.get(
+    "OASIS_TOKEN_COOKIE_NAME",
+    "bo_oasis_polytech_parisSession",
+)
+CURRENT_YEAR_COOKIE = os.environ.get(
+    "OASIS_CURRENT_YEAR_COOKIE",
+    "bo_oasis_polytech_parisyear",
+)
+SESSION_COOKIES = (TOKEN_COOKIE_NAME, CURRENT_YEAR_COOKIE)
+
+# Upper bound on in-flight requests to OASIS, shared by every account in the process.
+OASIS_MAX_CONCURRENT_REQUESTS = int(os.environ.get("OASIS_MAX_CONCURRENT_REQUESTS", "4"))
+_oasis_requests = asyncio.Semaphore(OASIS_MAX_CONCURRENT_REQUESTS)
+
+SEMESTERS = (1, 2)
+SEMESTER_TAB = "Courses"
+# How many semester pages of one account may be in flight at once.
+SEMESTER_FETCH_CONCURRENCY = int(os.environ.get("SEMESTER_FETCH_CONCURRENCY", "2"))
+
+def _iter_cookiejar(cookies: httpx.Cookies):
+    # httpx stores cookies in an underlying http.cookiejar.CookieJar.
+    # Iterating the jar yields http.cookiejar.Cookie objects.
+    return cookies.jar
+
+
+def _get_cookie(session: httpx.AsyncClient, name: str) -> Optional[Cookie]:
+    for c in _iter_cookiejar(session.cookies):
+        if c.name == name:
+            return c
+    return None
+
+
+async def _login(session: httpx.AsyncClient, login: str, password: str) -> None:
+    headers = {
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "Accept-Language": "fr-FR,fr;q=0.8",
+        "Connection": "keep-alive",
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "Origin": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org"),
+        "Referer": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org") + "/?",
+    }
+    data = {"login": login, "password": password, "url": ""}
+
+    with PHASE_SECONDS.time(phase="login"):
+        resp = await _post(session, LOGIN_URL, headers=headers, data=data, login=login)
+    print(f"Login response: {resp.status_code}")
+    resp.raise_for_status()
+    # session.cookies is now updated in-memory if server returned Set-Cookie
+    await _index_session(session, login)
+
+
+async def _index_session(session: httpx.AsyncClient, login: str) -> None:
+    """Re-index the session cookies, saving them whenever their values changed."""
+    if session_index.update(session, (_get_cookie(session, name) for name in SESSION_COOKIES)):
+        await persist_session(session, login, SESSION_COOKIES)
+
+
+def _sets_session_cookie(resp: httpx.Response) -> bool:
+    return any(header.split("=", 1)[0].strip() in SESSION_COOKIES for header in resp.headers.get_list("set-cookie"))
+
+
+async def _post(
+    session: httpx.AsyncClient, url: str, *, headers: dict[str, str], data: dict[str, str], login: str
+) -> httpx.Response:
+    async with _oasis_requests:
+        resp = await session.post(url, headers=headers, data=data)
+    OASIS_REQUEST_BYTES.inc(len(resp.request.content))
+    OASIS_RESPONSE_BYTES.inc(len(resp.content))
+    # OASIS may rotate the session on any response; keep the stored copy current
+    # so a restart doesn't resume with a stale one.
+    if _sets_session_cookie(resp):
+        await _index_session(session, login)
+    return resp
+
+
+async def ensure_valid_session(session: httpx.AsyncClient, login: str, password: str) -> None:
+    # The index avoids walking the cookie jar on every request; it is only
+    # (re)built from the jar for a client it hasn't seen yet.
+    fresh = session_index.is_fresh(session)
+    if fresh is None:
+        session_index.update(session, (_get_cookie(session, name) for name in SESSION_COOKIES))
+        fresh = session_index.is_fresh(session)
+
+    if not fresh:
+        await _login(session, login, password)
+
+
+async def _post_with_retry_on_auth(
+    session: httpx.AsyncClient,
+    url: str,
+    *,
+    headers: dict[str, str],
+    data: dict[str, str],
+    login: str,
+    password: str,
+) -> httpx.Response:
+    """POST and if auth fails (401/403), re-login and retry once."""
+    await ensure_valid_session(session, login, password)
+    resp = await _post(session, url, headers=headers, data=data, login=login)
+    if resp.status_code in (401, 403):
+        RELOGINS.inc()
+        await _login(session, login, password)
+        resp = await _post(session, url, headers=headers, data=data, login=login)
+    resp.raise_for_status()
+    return resp
+
+
+def _extract_html(resp: httpx.Response) -> str:
+    content_type = resp.headers.get("content-type", "")
+    if "application/json" in content_type:
+        payload = resp.json()
+        if isinstance(payload, dict):
+            for key in ("html", "content", "data", "result"):
+                value = payload.get(key)
+                if isinstance(value, str):
+                    return value
+        # Fallback to stringified JSON
+        return resp.text
+    return resp.text
+
+
+def _content_hash(html: str) -> str:
+    """Hash of the page with whitespace collapsed, so re-indentation doesn't count as a change."""
+    normalized = " ".join(html.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _get_year_value(session: httpx.AsyncClient) -> str:
+    cookie = _get_cookie(session, CURRENT_YEAR_COOKIE)
+    if cookie is not None and getattr(cookie, "value", ""):
+        return str(cookie.value)
+    # Allow overriding explicitly.
+    return os.environ.get("OASIS_YEAR", CURRENT_YEAR_COOKIE)
+
+
+async def _fetch_semester_html(
+    session: httpx.AsyncClient,
+    *,
+    student: str,
+    year_value: str,
+    semester_in_year: int,
+    tab: str,
+    login: str,
+    password: str,
+) -> str:
+    headers = {
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "Accept-Language": "fr-FR,fr;q=0.8",
+        "Connection": "keep-alive",
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "Origin": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org"),
+        "Referer": os.getenv("OASIS_BASE_URL", "https://polytech-saclay.oasis.aouka.org") + "/?",
+    }
+    data = {
+        "student": student,
+        "year": year_value,
+        "semester_in_year": str(semester_in_year),
+        "tab": tab,
+    }
+
+    resp = await _post_with_retry_on_auth(
+        session,
+        SEMESTER_URL,
+        headers=headers,
+        data=data,
+        login=login,
+        password=password,
+    )
+    return _extract_html(resp)
+
+
+async def _sync_grades_for_semester(
+    db: Database,
+    *,
+    student: str,
+    year: int,
+    semester: int,
+    grades: list[Grade],
+    dry_run: bool = False,
+) -> tuple[int, int, list[str]]:
+    """Returns (new_count, updated_count, details).
+
+    The semester slice is loaded once and diffed in memory; only new or changed
+    grades are written, in a single transaction (nothing is written on a dry run).
+    """
+    new_count = 0
+    updated_count = 0
+    details: list[str] = []
+
+    existing = {
+        (module_code, name, date): (Grade.make_fingerprint(note, avg_note, rank, appreciation), avg_note)
+        for _id, module_code, name, date, note, avg_note, rank, appreciation in await db.get_grades_for_semester(
+            student=student,
+            year=year,
+            semester=semester,
+        )
+    }
+
+    changed: list[tuple[str, str, str, str, str, str, str]] = []
+    events: list[tuple[str, str, str, str, str, str | None, str | None]] = []
+    for grade in grades:
+        key, fingerprint = grade.key, grade.fingerprint
+        old = existing.get(key)
+
+        if old is None:
+            new_count += 1
+            details.append(
+                f"NEW S{semester} {grade.module_code} | {grade.name} | {grade.date} | {grade.avg_note}"
+            )
+            events.extend(
+                (*key, "new", field, None, value)
+                for field, value in zip(Grade.FINGERPRINT_FIELDS, fingerprint)
+            )
+        else:
+            old_fingerprint, old_avg = old
+            if old_fingerprint == fingerprint:
+                continue
+            updated_count += 1
+            details.append(
+                f"UPD S{semester} {grade.module_code} | {grade.name} | {grade.date} | {old_avg}->{grade.avg_note}"
+            )
+            events.extend(
+                (*key, "update", field, before, after)
+                for field, before, after in zip(Grade.FINGERPRINT_FIELDS, old_fingerprint, fingerprint)
+                if before != after
+            )
+
+        # Pages occasionally repeat a row; diff later copies against this one.
+        existing[key] = (fingerprint, grade.avg_note)
+        changed.append((*key, *fingerprint))
+
+    if dry_run:
+        return new_count, updated_count, details
+
+    await db.upsert_grades(student=student, year=year, semester=semester, rows=changed, events=events)
+    ROWS_EXAMINED.inc(len(grades))
+    ROWS_CHANGED.inc(len(changed))
+
+    return new_count, updated_count, details
+
+
+async def _sync_semester(
+    session: httpx.AsyncClient,
+    db: Database,
+    *,
+    login: str,
+    password: str,
+    year_value: str,
+    year_int: int,
+    semester: int,
+    tab: str,
+    fetch_slots: asyncio.Semaphore,
+    dry_run: bool = False,
+) -> tuple[int, int, list[str]]:
+    """Fetch, parse and store one semester; runs independently of the other semesters.
+
+    A dry run fetches, parses and diffs, but leaves the database untouched.
+    """
+    async with fetch_slots:
+        with PHASE_SECONDS.time(phase="fetch", semester=semester):
+            html = await _fetch_semester_html(
+                session,
+                student=login,
+                year_value=year_value,
+                semester_in_year=semester,
+                tab=tab,
+                login=login,
+                password=password,
+            )
+
+    # Grades rarely move between polls: when the page is byte-for-byte the same
+    # as last time (modulo whitespace), there is nothing to parse or diff.
+    content_hash = _content_hash(html)
+    page_key = {"student": login, "year": year_int, "semester": semester, "tab": tab}
+    if await db.get_page_hash(**page_key) == content_hash:
+        PAGE_CACHE.inc(result="hit")
+        return 0, 0, []
+    PAGE_CACHE.inc(result="miss")
+
+    with PHASE_SECONDS.time(phase="parse"):
+        parsed = await parse_semester_async(html)
+
+    with PHASE_SECONDS.time(phase="db"):
+        result = await _sync_grades_for_semester(
+            db,
+            student=login,
+            year=year_int,
+            semester=semester,
+            grades=parsed.grades,
+            dry_run=dry_run,
+        )
+        if dry_run:
+            return result
+        summary_changed = await db.save_semester_summary(
+            student=login,
+            year=year_int,
+            semester=semester,
+            modules=[
+                (m.module_code, m.ue_code, m.title_fr, m.coef, m.bloc_code, m.note, m.avg_note, m.rank, m.ec)
+                for m in parsed.modules
+            ],
+            ues=[(u.ue_code, u.title_fr, u.ects, u.note, u.avg_note, u.rank, u.resultat) for u in parsed.ues],
+            average=parsed.average,
+        )
+        # After both writes: a read between them is cached under the old
+        # generation and dropped here, never kept with half-updated data. A
+        # page that moved without changing any stored value keeps the ETag.
+        new_count, updated_count, _details = result
+        if new_count or updated_count or summary_changed:
+            read_cache.invalidate(login)
+        # Only remember the page once its grades are safely stored.
+        await db.set_page_hash(**page_key, content_hash=content_hash)
+    return result
+
+
+async def sync_once(
+    *,
+    session: httpx.AsyncClient,
+    db: Database,
+    login: str,
+    password: str,
+    semesters: tuple[int, ...] = SEMESTERS,
+    dry_run: bool = False,
+) -> dict[int, int]:
+    """Sync the given semesters of the current year; returns the number of changed grades per semester.
+
+    With `dry_run`, changes are detected and printed but neither stored nor sent.
+    """
+    await ensure_valid_session(session, login, password)
+
+    # Resolve year from cookie when possible.
+    year_value = _get_year_value(session)
+    try:
+        year_int = int(year_value)
+    except ValueError:
+        # If the server expects a non-numeric value, we still pass it along,
+        # but use the current calendar year for DB bucketing.
+        year_int = datetime.now(timezone.utc).year
+
+    total_new = 0
+    total_updated = 0
+    all_details: list[str] = []
+
+    # Fetch all semesters at once; each one is parsed and synced as soon as its
+    # response arrives, so a cycle takes about as long as the slowest request.
+    fetch_slots = asyncio.Semaphore(SEMESTER_FETCH_CONCURRENCY)
+    results = await asyncio.gather(
+        *(
+            _sync_semester(
+                session,
+                db,
+                login=login,
+                password=password,
+                year_value=year_value,
+                year_int=year_int,
+                semester=semester,
+                tab=SEMESTER_TAB,
+                fetch_slots=fetch_slots,
+                dry_run=dry_run,
+            )
+            for semester in semesters
+        ),
+        return_exceptions=True,
+    )
+
+    errors: list[BaseException] = []
+    changes: dict[int, int] = {}
+    for semester, result in zip(semesters, results):
+        if isinstance(result, BaseException):
+            errors.append(result)
+            continue
+        new_count, updated_count, details = result
+        changes[semester] = new_count + updated_count
+        total_new += new_count
+        total_updated += updated_count
+        all_details.extend(details)
+
+    if total_new or total_updated:
+        # Long change lists are split across embeds by the webhook module, not truncated.
+        lines = [
+            f"[{login}] New: {total_new} | Updated: {total_updated}",
+        ]
+        lines.extend(all_details)
+        if dry_run:
+            print("\n".join(["(dry run, not stored)", *lines]))
+        else:
+            with PHASE_SECONDS.time(phase="webhook"):
+                await send_webhook("\n".join(lines))
+    elif not errors:
+        print(
+            f"[{login}] No grade changes detected. "
+            f"(unchanged pages skipped: {PAGE_CACHE.value(result='hit'):g}, parsed: {PAGE_CACHE.value(result='miss'):g})"
+        )
+
+    # Changes from semesters that succeeded are already stored and notified;
+    # surface the first failure so the caller logs it.
+    if errors:
+        raise errors[0]
+    return changes
+
+
+class OasisClients:
+    """Per-account OASIS clients over one shared transport (pool, retries, circuit breaker)."""
+
+    def __init__(self, transport: OasisTransport, store: SessionStore | None):
+        self.transport = transport
+        self.store = store
+        self.restored = 0
+
+    async def open(self, login: str) -> httpx.AsyncClient:
+        """A client for `login`, carrying its saved session when there is one.
+
+        Clients are not closed individually: closing one would close the shared transport.
+        """
+        session = new_oasis_client(self.transport)
+        if self.store is not None and await self.store.restore(session, login, SESSION_COOKIES):
+            self.restored += 1
+        return session
+
+
+@asynccontextmanager
+async def oasis_clients(db: Database, *, persist_sessions: bool = True) -> AsyncIterator[OasisClients]:
+    """The shared transport and session store for the duration of the block.
+
+    Without `persist_sessions`, sessions are neither restored nor saved and the
+    session key is never loaded or created.
+    """
+    store = SessionStore.from_env(db) if persist_sessions else None
+    transport = OasisTransport()
+    set_session_store(store)
+    try:
+        yield OasisClients(transport, store)
+    finally:
+        set_session_store(None)
+        await transport.aclose()
@@ -0,0 +1,207 @@
+"""The HTTP transport every OASIS client shares.
+
+It pools keep-alive connections (HTTP/2 when the `h2` package is installed,
+so one connection carries every account's requests), lets httpx decode
+gzip/brotli responses, and retries timeouts, connection errors and 5xx
+responses with jittered exponential backoff inside a per-request deadline.
+
+A circuit breaker sits in front of all of it: after OASIS_BREAKER_THRESHOLD
+consecutive failed requests, new requests wait for a cool-down instead of
+each account timing out on its own. Once it has passed, one probe request
+goes through; the others wait for its outcome.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import random
+
+import httpx
+
+from metrics import OASIS_RETRIES, OASIS_BREAKER_OPENS
+
+# Keep-alive pool shared by every account's client (each still has its own cookie jar).
+OASIS_MAX_CONNECTIONS = int(os.environ.get("OASIS_MAX_CONNECTIONS", "10"))
+OASIS_HTTP2 = os.environ.get("OASIS_HTTP2", "1") not in ("", "0", "false")
+OASIS_TIMEOUT_SECONDS = float(os.environ.get("OASIS_TIMEOUT_SECONDS", "30"))
+# Total time one request may take across all of its attempts and backoff sleeps.
+OASIS_REQUEST_DEADLINE_SECONDS = float(os.environ.get("OASIS_REQUEST_DEADLINE_SECONDS", "90"))
+OASIS_MAX_ATTEMPTS = int(os.environ.get("OASIS_MAX_ATTEMPTS", "4"))
+OASIS_BACKOFF_SECONDS = float(os.environ.get("OASIS_BACKOFF_SECONDS", "1"))
+OASIS_BACKOFF_MAX_SECONDS = float(os.environ.get("OASIS_BACKOFF_MAX_SECONDS", "20"))
+OASIS_BREAKER_THRESHOLD = int(os.environ.get("OASIS_BREAKER_THRESHOLD", "5"))
+OASIS_BREAKER_COOLDOWN_SECONDS = float(os.environ.get("OASIS_BREAKER_COOLDOWN_SECONDS", "60"))
+OASIS_BREAKER_MAX_COOLDOWN_SECONDS = float(os.environ.get("OASIS_BREAKER_MAX_COOLDOWN_SECONDS", "900"))
+
+_RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+def _network_transport(*, max_connections: int, http2: bool) -> httpx.AsyncBaseTransport:
+    """The pooled transport to OASIS, or a recording/replay of it (see recording.py)."""
+    import recording
+
+    if recording.OASIS_REPLAY_DIR:
+        replay = recording.ReplayTransport(recording.ResponseStore(recording.OASIS_REPLAY_DIR))
+        print(f"Replaying {replay.recorded} recorded OASIS exchange(s) from {recording.OASIS_REPLAY_DIR}")
+        return replay
+
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("OASIS_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+        http2 = False
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+    if recording.OASIS_RECORD_DIR:
+        print(f"Recording OASIS exchanges to {recording.OASIS_RECORD_DIR}")
+        transport = recording.RecordingTransport(transport, recording.ResponseStore(recording.OASIS_RECORD_DIR))
+    return transport
+
+
+class CircuitBreaker:
+    """Shared open/half-open/closed state over consecutive request failures."""
+
+    def __init__(
+        self,
+        *,
+        threshold: int = OASIS_BREAKER_THRESHOLD,
+        cooldown: float = OASIS_BREAKER_COOLDOWN_SECONDS,
+        max_cooldown: float = OASIS_BREAKER_MAX_COOLDOWN_SECONDS,
+    ):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self._probe_done: asyncio.Event | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold
+
+    async def acquire(self) -> bool:
+        """Wait until a request may go out; True when it is the half-open probe."""
+        loop = asyncio.get_running_loop()
+        while self.is_open:
+            remaining = self.open_until - loop.time()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            elif self._probe_done is not None:
+                await self._probe_done.wait()
+            else:
+                self._probe_done = asyncio.Event()
+                return True
+        return False
+
+    def record(self, ok: bool | None, *, probe: bool) -> None:
+        """Count a request's outcome (None: cancelled, not counted) and release the probe slot."""
+        if ok is None:
+            pass
+        elif ok:
+            if self.is_open:
+                print("OASIS is reachable again; resuming requests")
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+        else:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if probe:
+                    # Still down: wait longer before the next probe.
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                if probe or self.failures == self.threshold:
+                    OASIS_BREAKER_OPENS.inc()
+                    print(f"OASIS looks down ({self.failures} failed requests); pausing requests for {self.cooldown:g}s")
+                self.open_until = asyncio.get_running_loop().time() + self.cooldown
+        if probe and self._probe_done is not None:
+            self._probe_done.set()
+            self._probe_done = None
+
+
+class OasisTransport(httpx.AsyncBaseTransport):
+    """Retries and the circuit breaker around a pooled httpx transport."""
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = OASIS_MAX_CONNECTIONS,
+        http2: bool = OASIS_HTTP2,
+        deadline: float = OASIS_REQUEST_DEADLINE_SECONDS,
+        max_attempts: int = OASIS_MAX_ATTEMPTS,
+        breaker: CircuitBreaker | None = None,
+        inner: httpx.AsyncBaseTransport | None = None,
+    ):
+        if inner is None:
+            inner = _network_transport(max_connections=max_connections, http2=http2)
+        self.inner = inner
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        self.breaker = breaker or CircuitBreaker()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spread retries from many accounts over the whole window.
+        return random.uniform(0, min(OASIS_BACKOFF_MAX_SECONDS, OASIS_BACKOFF_SECONDS * 2 ** (attempt - 1)))
+
+    async def _attempt(self, request: httpx.Request, timeout: float) -> httpx.Response:
+        try:
+            async with asyncio.timeout(timeout):
+                return await self.inner.handle_async_request(request)
+        except TimeoutError:
+            raise httpx.ReadTimeout("OASIS request deadline exceeded", request=request) from None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Form bodies are small; buffer them so every attempt can resend.
+        await request.aread()
+        probe = await self.breaker.acquire()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+
+        # None when cancelled: that says nothing about OASIS' health.
+        ok: bool | None = None
+        try:
+            for attempt in range(1, self.max_attempts):
+                try:
+                    response = await self._attempt(request, deadline - loop.time())
+                except httpx.TransportError:
+                    if deadline - loop.time() <= 0:
+                        ok = False
+                        raise
+                else:
+                    if response.status_code not in _RETRY_STATUSES:
+                        ok = True
+                        return response
+                    await response.aclose()
+
+                delay = self._backoff(attempt)
+                if loop.time() + delay >= deadline:
+                    ok = False
+                    raise httpx.ReadTimeout("OASIS request deadline exceeded", request=request)
+                OASIS_RETRIES.inc()
+                await asyncio.sleep(delay)
+
+            # The last attempt's outcome is final, retryable status or not.
+            try:
+                response = await self._attempt(request, deadline - loop.time())
+            except httpx.TransportError:
+                ok = False
+                raise
+            ok = response.status_code not in _RETRY_STATUSES
+            return response
+        finally:
+            self.breaker.record(ok, probe=probe)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def new_oasis_client(transport: OasisTransport) -> httpx.AsyncClient:
+    """A client with its own cookie jar over the shared transport.
+
+    Don't close it individually: that would close the shared transport.
+    """
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(OASIS_TIMEOUT_SECONDS))
@@ -1,43 +1,244 @@
 from __future__ import annotations
 
+import asyncio
+import random
 from datetime import datetime, timezone
 from os import getenv
 
 import httpx
 
+# Discord limits, see https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+_TITLE_LIMIT = 256
+_DESCRIPTION_LIMIT = 4096
+_EMBEDS_PER_MESSAGE = 10
+_CHARS_PER_MESSAGE = 6000
 
-def _to_embed_payload(message: str) -> dict:
-    """Convert a plain text message into a Discord embed payload."""
+WEBHOOK_QUEUE_SIZE = int(getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+# Messages arriving within this window after the first one are sent together.
+WEBHOOK_COALESCE_SECONDS = float(getenv("WEBHOOK_COALESCE_SECONDS", "2"))
+WEBHOOK_MAX_ATTEMPTS = int(getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+
+
+def _split_description(description: str) -> list[str]:
+    """Split on line boundaries into chunks that fit an embed description."""
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for line in description.splitlines():
+        while len(line) > _DESCRIPTION_LIMIT:
+            # A single oversized line: flush, then hard-split it.
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(line[:_DESCRIPTION_LIMIT])
+            line = line[_DESCRIPTION_LIMIT:]
+        added = len(line) + (1 if current else 0)
+        if size + added > _DESCRIPTION_LIMIT:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+            added = len(line)
+        current.append(line)
+        size += added
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _to_embeds(message: str, timestamp: str) -> list[dict]:
+    """Convert a plain text message into one or more Discord embeds (nothing is dropped)."""
     message = (message or "").strip()
     if not message:
         message = "(empty message)"
 
     lines = message.splitlines()
-    title = lines[0][:256] if lines else "Update"
+    title = lines[0][:_TITLE_LIMIT] if lines else "Update"
     description = "\n".join(lines[1:]).strip() if len(lines) > 1 else ""
 
-    # Discord embed description limit is 4096 characters.
-    if len(description) > 4096:
-        description = description[:4093] + "..."
+    chunks = _split_description(description) or [""]
+    embeds: list[dict] = []
+    for index, chunk in enumerate(chunks):
+        embed_title = title
+        if len(chunks) > 1:
+            suffix = f" ({index + 1}/{len(chunks)})"
+            embed_title = title[: _TITLE_LIMIT - len(suffix)] + suffix
+        embed: dict = {"title": embed_title, "timestamp": timestamp}
+        if chunk:
+            embed["description"] = chunk
+        embeds.append(embed)
+    return embeds
+
+
+def _to_embed_payloads(messages: list[str]) -> list[dict]:
+    """Pack the embeds of several messages into as few webhook payloads as Discord allows."""
+    timestamp = datetime.now(timezone.utc).isoformat()
+
+    payloads: list[dict] = []
+    embeds: list[dict] = []
+    chars = 0
+    for message in messages:
+        for embed in _to_embeds(message, timestamp):
+            size = len(embed["title"]) + len(embed.get("description", ""))
+            if embeds and (len(embeds) >= _EMBEDS_PER_MESSAGE or chars + size > _CHARS_PER_MESSAGE):
+                payloads.append({"content": "", "embeds": embeds})
+                embeds, chars = [], 0
+            embeds.append(embed)
+            chars += size
+    if embeds:
+        payloads.append({"content": "", "embeds": embeds})
+    return payloads
+
+
+def _payload_text(payload: dict) -> str:
+    return "\n".join(
+        "\n".join(part for part in (embed["title"], embed.get("description", "")) if part)
+        for embed in payload["embeds"]
+    )
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    """Seconds Discord asks us to wait on a 429 (JSON `retry_after`, else the header)."""
+    try:
+        payload = resp.json()
+        if isinstance(payload, dict) and "retry_after" in payload:
+            return float(payload["retry_after"])
+    except ValueError:
+        pass
+    header = resp.headers.get("retry-after")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            return None
+    return None
+
+
+async def _post_payload(client: httpx.AsyncClient, webhook_url: str, payload: dict) -> None:
+    """POST one payload, honouring 429 retry_after and backing off on 5xx/transport errors."""
+    for attempt in range(1, WEBHOOK_MAX_ATTEMPTS + 1):
+        try:
+            resp = await client.post(webhook_url, json=payload)
+        except httpx.TransportError:
+            if attempt == WEBHOOK_MAX_ATTEMPTS:
+                raise
+            await asyncio.sleep(min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+            continue
+
+        if resp.status_code == 429 and attempt < WEBHOOK_MAX_ATTEMPTS:
+            await asyncio.sleep(_retry_after(resp) or 1.0)
+            continue
+        if resp.status_code >= 500 and attempt < WEBHOOK_MAX_ATTEMPTS:
+            await asyncio.sleep(min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+            continue
+        resp.raise_for_status()
+        return
+
 
-    embed: dict = {
-        "title": title,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
-    if description:
-        embed["description"] = description
+class WebhookDispatcher:
+    """Background delivery of webhook messages over one pooled client.
 
-    return {"content": "", "embeds": [embed]}
+    `submit()` only enqueues, so syncs never wait on Discord. Messages that
+    arrive close together (e.g. from several accounts) are coalesced into
+    as few requests as the embed limits allow.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str,
+        *,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        coalesce_seconds: float = WEBHOOK_COALESCE_SECONDS,
+    ):
+        self.webhook_url = webhook_url
+        self.coalesce_seconds = coalesce_seconds
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._client: httpx.AsyncClient | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(15.0))
+        self._worker = asyncio.create_task(self._run(), name="webhook-dispatcher")
+
+    async def stop(self) -> None:
+        """Deliver what is already queued, then stop."""
+        if self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def submit(self, message: str) -> None:
+        # Bounded: if Discord is down for long, producers slow down instead of using unbounded memory.
+        await self._queue.put(message)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.coalesce_seconds
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                assert self._client is not None
+                # Payloads are independent (they may carry other accounts'
+                # changes): one that exhausts its retries must not stop the rest.
+                for payload in _to_embed_payloads(batch):
+                    try:
+                        await _post_payload(self._client, self.webhook_url, payload)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as exc:
+                        # Logged in full, like an unconfigured webhook, so the changes aren't lost.
+                        print(f"Webhook delivery failed: {exc!r}; undelivered:\n{_payload_text(payload)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_dispatcher: WebhookDispatcher | None = None
+
+
+async def start_webhook_dispatcher() -> WebhookDispatcher | None:
+    """Route send_webhook through a background dispatcher; None when WEBHOOK_URL is unset."""
+    global _dispatcher
+    webhook_url = getenv("WEBHOOK_URL", "")
+    if not webhook_url:
+        return None
+    _dispatcher = WebhookDispatcher(webhook_url)
+    await _dispatcher.start()
+    return _dispatcher
+
+
+async def stop_webhook_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        dispatcher, _dispatcher = _dispatcher, None
+        await dispatcher.stop()
 
 
 async def send_webhook(message: str) -> None:
+    if _dispatcher is not None:
+        await _dispatcher.submit(message)
+        return
+
     webhook_url = getenv("WEBHOOK_URL", "")
     if not webhook_url:
         # No webhook configured; keep behavior non-fatal.
         print(message)
         return
 
-    payload = _to_embed_payload(message)
     async with httpx.AsyncClient(timeout=httpx.Timeout(15.0)) as client:
-        resp = await client.post(webhook_url, json=payload)
-        resp.raise_for_status()
\ No newline at end of file
+        for payload in _to_embed_payloads([message]):
+            await _post_payload(client, webhook_url, payload)
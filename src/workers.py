@@ -0,0 +1,224 @@
+"""Worker mode: several processes share the accounts through leases in the database.
+
+Every worker loads the same account list (ACCOUNTS_FILE), registers it in the
+lease table and syncs only the accounts it holds a lease on. Leases last
+WORKER_LEASE_SECONDS and are renewed every WORKER_HEARTBEAT_SECONDS; a worker
+that dies simply stops renewing and its accounts are claimed by the others
+once the leases run out. Each worker aims for an even share of the accounts
+among live workers, releasing extras when a new worker joins.
+
+Lease times are wall-clock seconds, so hosts sharing a database need
+reasonably synchronized clocks (well under WORKER_LEASE_SECONDS apart).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import secrets
+import socket
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from accounts import Account
+from database import Database
+from scheduler import AdaptivePolicy, _account_loop
+from sync import oasis_clients
+
+WORKER_LEASE_SECONDS = float(os.environ.get("WORKER_LEASE_SECONDS", "60"))
+WORKER_HEARTBEAT_SECONDS = float(os.environ.get("WORKER_HEARTBEAT_SECONDS", "15"))
+
+
+class LeaseBackend(ABC):
+    """Where leases live. Every method must be atomic across processes."""
+
+    @abstractmethod
+    async def register_accounts(self, logins: Iterable[str]) -> None:
+        """Make sure every login has a (possibly unowned) lease row."""
+
+    @abstractmethod
+    async def heartbeat(self, worker_id: str, ttl: float) -> int:
+        """Mark this worker alive for `ttl` seconds; returns the number of live workers."""
+
+    @abstractmethod
+    async def renew(self, worker_id: str, logins: Iterable[str], ttl: float) -> set[str]:
+        """Extend this worker's leases on `logins`; returns those it still owns."""
+
+    @abstractmethod
+    async def claim(self, worker_id: str, logins: Iterable[str], limit: int, ttl: float) -> list[str]:
+        """Take up to `limit` of `logins` that are unowned or whose lease expired."""
+
+    @abstractmethod
+    async def release(self, worker_id: str, logins: Iterable[str]) -> None:
+        """Give up this worker's leases on `logins` so others can claim them right away."""
+
+    @abstractmethod
+    async def leave(self, worker_id: str) -> None:
+        """Release everything this worker owns and forget it."""
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases in the app's SQLite database (tables from migration 7).
+
+    Claims and renewals are single UPDATE statements, which SQLite runs under
+    its database write lock, so two processes can never own the same row.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def register_accounts(self, logins: Iterable[str]) -> None:
+        async with self.db.transaction() as conn:
+            await conn.executemany(
+                "INSERT OR IGNORE INTO account_leases (login) VALUES (?);",
+                [(login,) for login in logins],
+            )
+
+    async def heartbeat(self, worker_id: str, ttl: float) -> int:
+        now = time.time()
+        async with self.db.transaction() as conn:
+            await conn.execute(
+                """
+                INSERT INTO lease_workers (worker_id, alive_until) VALUES (?, ?)
+                ON CONFLICT(worker_id) DO UPDATE SET alive_until = excluded.alive_until;
+                """,
+                (worker_id, now + ttl),
+            )
+            await conn.execute("DELETE FROM lease_workers WHERE alive_until < ?;", (now,))
+            async with conn.execute("SELECT COUNT(*) FROM lease_workers;") as cursor:
+                (count,) = await cursor.fetchone()
+        return count
+
+    async def renew(self, worker_id: str, logins: Iterable[str], ttl: float) -> set[str]:
+        logins = list(logins)
+        if not logins:
+            return set()
+        placeholders = ", ".join("?" * len(logins))
+        # Ownership alone decides: a lease that lapsed but was not claimed by
+        # anyone else is still ours to extend.
+        async with self.db.transaction() as conn:
+            async with conn.execute(
+                f"UPDATE account_leases SET lease_expires = ? WHERE owner = ? AND login IN ({placeholders}) RETURNING login;",
+                (time.time() + ttl, worker_id, *logins),
+            ) as cursor:
+                return {login for (login,) in await cursor.fetchall()}
+
+    async def claim(self, worker_id: str, logins: Iterable[str], limit: int, ttl: float) -> list[str]:
+        logins = list(logins)
+        if not logins or limit <= 0:
+            return []
+        now = time.time()
+        placeholders = ", ".join("?" * len(logins))
+        async with self.db.transaction() as conn:
+            async with conn.execute(
+                f"""
+                UPDATE account_leases SET owner = ?, lease_expires = ?
+                WHERE login IN (
+                    SELECT login FROM account_leases
+                    WHERE (owner IS NULL OR lease_expires < ?) AND login IN ({placeholders})
+                    ORDER BY lease_expires
+                    LIMIT ?
+                )
+                RETURNING login;
+                """,
+                (worker_id, now + ttl, now, *logins, limit),
+            ) as cursor:
+                return [login for (login,) in await cursor.fetchall()]
+
+    async def release(self, worker_id: str, logins: Iterable[str]) -> None:
+        logins = list(logins)
+        if not logins:
+            return
+        placeholders = ", ".join("?" * len(logins))
+        await self.db.execute(
+            f"UPDATE account_leases SET owner = NULL, lease_expires = 0 WHERE owner = ? AND login IN ({placeholders});",
+            (worker_id, *logins),
+        )
+
+    async def leave(self, worker_id: str) -> None:
+        async with self.db.transaction() as conn:
+            await conn.execute(
+                "UPDATE account_leases SET owner = NULL, lease_expires = 0 WHERE owner = ?;",
+                (worker_id,),
+            )
+            await conn.execute("DELETE FROM lease_workers WHERE worker_id = ?;", (worker_id,))
+
+
+async def _stop(tasks: dict[str, asyncio.Task], logins: Iterable[str]) -> None:
+    stopping = [tasks.pop(login) for login in list(logins) if login in tasks]
+    for task in stopping:
+        task.cancel()
+    await asyncio.gather(*stopping, return_exceptions=True)
+
+
+async def run_worker(
+    accounts: list[Account],
+    *,
+    db: Database,
+    interval: float,
+    backend: LeaseBackend | None = None,
+    lease_seconds: float = WORKER_LEASE_SECONDS,
+    heartbeat_seconds: float = WORKER_HEARTBEAT_SECONDS,
+) -> None:
+    """Sync the accounts this worker holds leases on, forever."""
+    backend = backend or SQLiteLeaseBackend(db)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+    by_login = {account.login: account for account in accounts}
+    await backend.register_accounts(by_login)
+
+    policy = AdaptivePolicy(base=interval)
+    tasks: dict[str, asyncio.Task] = {}
+    print(f"Worker {worker_id} starting; {len(by_login)} account(s) configured, lease={lease_seconds:g}s")
+    # Other workers may have logged an account in; its session is in the shared DB.
+    async with oasis_clients(db) as clients:
+        async def start(login: str) -> None:
+            session = await clients.open(login)
+            tasks[login] = asyncio.create_task(
+                _account_loop(by_login[login], session=session, db=db, policy=policy),
+                name=f"sync:{login}",
+            )
+
+        try:
+            while True:
+                # A loop that ended on its own won't sync again; let someone else have it.
+                finished = [login for login, task in tasks.items() if task.done()]
+                if finished:
+                    await _stop(tasks, finished)
+                    await backend.release(worker_id, finished)
+
+                try:
+                    workers = await backend.heartbeat(worker_id, lease_seconds)
+                    owned = await backend.renew(worker_id, tasks.keys(), lease_seconds)
+                except Exception as exc:
+                    # Without a renewal we can't tell whether our leases survive;
+                    # stop syncing before anyone could take them over.
+                    print(f"Worker {worker_id}: lease renewal failed ({exc!r}); pausing {len(tasks)} account(s)")
+                    await _stop(tasks, tasks.keys())
+                    await asyncio.sleep(heartbeat_seconds)
+                    continue
+
+                lost = tasks.keys() - owned
+                if lost:
+                    print(f"Worker {worker_id}: lost lease on {', '.join(sorted(lost))}")
+                    await _stop(tasks, lost)
+
+                share = math.ceil(len(by_login) / max(workers, 1))
+                if len(tasks) > share:
+                    extra = sorted(tasks)[share:]
+                    await _stop(tasks, extra)
+                    await backend.release(worker_id, extra)
+                    print(f"Worker {worker_id}: released {len(extra)} account(s) to {workers - 1} other worker(s)")
+                elif len(tasks) < share:
+                    for login in await backend.claim(worker_id, by_login.keys() - tasks.keys(), share - len(tasks), lease_seconds):
+                        await start(login)
+                        print(f"Worker {worker_id}: claimed {login}")
+
+                await asyncio.sleep(heartbeat_seconds)
+        finally:
+            await _stop(tasks, tasks.keys())
+            try:
+                await backend.leave(worker_id)
+            except Exception as exc:
+                print(f"Worker {worker_id}: could not release leases ({exc!r}); they expire in {lease_seconds:g}s")
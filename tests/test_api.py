@@ -0,0 +1,48 @@
+"""The read API caps and validates `?limit=` on the changes endpoint."""
+
+import asyncio
+import json
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import api
+from api import ReadCache, _handler
+from database import Database
+
+
+async def _changes(path, query: dict[str, list[str]], *, rows: int = 12, cap: int = 5):
+    async with Database(str(path)) as db:
+        await db.create_tables()
+        await db.upsert_grades(
+            student="alice",
+            year=2025,
+            semester=1,
+            rows=[],
+            events=[(f"M{i}", "Exam", "01/01/2025", "new", "note", None, "12") for i in range(rows)],
+        )
+        handle = _handler(db, ReadCache())
+        original, api.API_CHANGES_LIMIT = api.API_CHANGES_LIMIT, cap
+        try:
+            return await handle("/students/alice/changes", query, {})
+        finally:
+            api.API_CHANGES_LIMIT = original
+
+
+def test_changes_limit_is_capped(tmp_path):
+    for query in ({}, {"limit": ["1000"]}):
+        status, _headers, body = asyncio.run(_changes(tmp_path / f"{len(query)}.db", query))
+        assert status == 200
+        assert len(json.loads(body)["changes"]) == 5
+
+
+def test_changes_limit_below_cap_is_kept(tmp_path):
+    status, _headers, body = asyncio.run(_changes(tmp_path / "api.db", {"limit": ["3"]}))
+    assert status == 200
+    payload = json.loads(body)
+    assert [change["module_code"] for change in payload["changes"]] == ["M0", "M1", "M2"]
+    assert payload["cursor"] == payload["changes"][-1]["seq"]
+
+
+def test_non_positive_limit_is_rejected(tmp_path):
+    for i, limit in enumerate(("0", "-1")):
+        status, _headers, body = asyncio.run(_changes(tmp_path / f"{i}.db", {"limit": [limit]}))
+        assert (status, body) == (400, b"")
@@ -0,0 +1,78 @@
+"""Backfill walks the years OASIS lists for the student, not a fixed count."""
+
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import sync
+from accounts import Account
+from backfill import backfill_account
+from benchmarks.generator import generate_semester_html
+from database import Database
+
+CURRENT_YEAR = 2025
+
+
+def _oasis(listed_years: list[int]):
+    """A mock OASIS whose semester pages carry a year selector over `listed_years` (none if empty)."""
+    fetched = []
+    selector = "".join(f'<option value="{year}">{year}-{year + 1}</option>' for year in listed_years)
+
+    def handler(request):
+        if "login" in request.url.params["route"]:
+            return httpx.Response(
+                200,
+                headers=[
+                    ("Set-Cookie", f"{sync.TOKEN_COOKIE_NAME}=token; Max-Age=3600; Path=/"),
+                    ("Set-Cookie", f"{sync.CURRENT_YEAR_COOKIE}={CURRENT_YEAR}; Max-Age=3600; Path=/"),
+                ],
+            )
+        form = {name: values[0] for name, values in parse_qs(request.content.decode()).items()}
+        year, semester = int(form["year"]), int(form["semester_in_year"])
+        fetched.append((year, semester))
+        html = generate_semester_html(n_tests=3, year=year, semester=semester, seed=year)
+        if listed_years:
+            html = f'<select id="yearSelect"><option value="">Année</option>{selector}</select>' + html
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, text=html)
+
+    return httpx.MockTransport(handler), fetched
+
+
+async def _backfill(path, listed_years: list[int], *, runs: int = 1, years: int = 2):
+    transport, fetched = _oasis(listed_years)
+    written = []
+    async with Database(str(path)) as db:
+        await db.create_tables()
+        async with httpx.AsyncClient(transport=transport) as session:
+            for _ in range(runs):
+                written.append(await backfill_account(Account("alice", "pw"), session=session, db=db, years=years))
+    return fetched, written
+
+
+def test_listed_years_are_backfilled(tmp_path):
+    fetched, (written,) = asyncio.run(_backfill(tmp_path / "b.db", [2025, 2024, 2021], years=1))
+    # One look at the current year for the selector, then every listed past year; the gap is skipped.
+    assert fetched[0] == (CURRENT_YEAR, 1)
+    assert sorted(fetched[1:]) == [(2021, 1), (2021, 2), (2024, 1), (2024, 2)]
+    assert sorted(written) == [(2021, 1), (2021, 2), (2024, 1), (2024, 2)]
+    assert all(count == 3 for count in written.values())
+
+
+def test_first_year_students_have_nothing_to_backfill(tmp_path):
+    fetched, (written,) = asyncio.run(_backfill(tmp_path / "b.db", [2025]))
+    assert fetched == [(CURRENT_YEAR, 1)]
+    assert written == {}
+
+
+def test_checkpointed_semesters_are_not_fetched_again(tmp_path):
+    fetched, (first, second) = asyncio.run(_backfill(tmp_path / "b.db", [2025, 2024], runs=2))
+    assert len(first) == 2 and second == {}
+    assert fetched.count((2024, 1)) == 1
+
+
+def test_falls_back_to_a_year_count_without_a_selector(tmp_path, capsys):
+    fetched, (written,) = asyncio.run(_backfill(tmp_path / "b.db", [], years=2))
+    assert sorted(written) == [(2023, 1), (2023, 2), (2024, 1), (2024, 2)]
+    assert "OASIS lists no years; walking back 2 year(s)" in capsys.readouterr().out
@@ -0,0 +1,133 @@
+"""Schema migrations from a pre-versioning DB, and the grade change log."""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from database import SCHEMA_VERSION, Database
+
+# The schema as the unversioned create_tables left it: duplicate grades were
+# possible (the unique index was skipped when they existed) and modules/ue had
+# no per-student columns.
+_BASELINE_SCHEMA = """
+    CREATE TABLE grades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student TEXT, year INTEGER, semester INTEGER,
+        module_code TEXT NOT NULL, name TEXT NOT NULL, date DATE NOT NULL,
+        note TEXT, avg_note TEXT, rank TEXT, appreciation TEXT
+    );
+    CREATE TABLE modules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        module_code TEXT NOT NULL, ue_code TEXT NOT NULL, title_fr TEXT NOT NULL, coef REAL NOT NULL,
+        bloc_code TEXT NOT NULL, note TEXT, avg_note TEXT, rank TEXT, ec TEXT
+    );
+    CREATE TABLE ue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ue_code TEXT NOT NULL, title_fr TEXT NOT NULL, ects REAL NOT NULL,
+        note TEXT, avg_note TEXT, rank TEXT, resultat TEXT NOT NULL
+    );
+"""
+
+
+def _baseline_db(path) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(_BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO grades (student, year, semester, module_code, name, date, note, avg_note, rank, appreciation) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+        [
+            ("alice", 2025, 1, "M1", "Exam", "01/01/2025", "10", "9", "5/40", ""),
+            ("alice", 2025, 1, "M1", "Exam", "01/01/2025", "12,5", "11", "3/40", "Bien"),
+            ("alice", 2025, 1, "M2", "Exam", "02/01/2025", "&mdash;", "8", "", ""),
+            ("bob", 2025, 1, "M1", "Exam", "01/01/2025", "7", "9", "30/40", ""),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO modules (module_code, ue_code, title_fr, coef, bloc_code, note) VALUES (?, ?, ?, ?, ?, ?);",
+        [("M1", "UE1", "Analyse", 2.0, "B1", "10"), ("M1", "UE1", "Analyse", 2.0, "B1", "11")],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _migrate(path, *, runs: int = 1) -> list[tuple]:
+    async with Database(str(path)) as db:
+        for _ in range(runs):
+            await db.create_tables()
+        assert await db.schema_version() == SCHEMA_VERSION
+        return await db.execute(
+            "SELECT student, module_code, note, note_value, avg_value, rank_pos, rank_size FROM grades ORDER BY student, module_code;"
+        )
+
+
+def test_baseline_db_is_migrated(tmp_path):
+    path = tmp_path / "baseline.db"
+    _baseline_db(path)
+    grades = asyncio.run(_migrate(path))
+
+    # The most recently written copy of a duplicated grade is kept, with its numbers parsed.
+    assert grades == [
+        ("alice", "M1", "12,5", 12.5, 11.0, 3, 40),
+        ("alice", "M2", "&mdash;", None, 8.0, None, None),
+        ("bob", "M1", "7", 7.0, 9.0, 30, 40),
+    ]
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT note FROM modules;").fetchall() == [("11",)]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(
+            "INSERT INTO grades (student, year, semester, module_code, name, date) "
+            "VALUES ('alice', 2025, 1, 'M1', 'Exam', '01/01/2025');"
+        )
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    assert {"grade_events", "page_hashes", "semesters", "sessions", "backfill_checkpoints", "account_leases"} <= tables
+    conn.close()
+
+
+def test_migrations_run_once(tmp_path, capsys):
+    path = tmp_path / "baseline.db"
+    _baseline_db(path)
+    asyncio.run(_migrate(path, runs=2))
+    assert capsys.readouterr().out.count("Applied database migration") == SCHEMA_VERSION
+
+
+def test_new_db_reaches_the_current_version(tmp_path):
+    assert asyncio.run(_migrate(tmp_path / "new.db")) == []
+
+
+async def _changes_pages(path, limit: int, *, student: str | None = None) -> list[tuple[list[tuple], int]]:
+    """Pages through changes_since until the cursor stops moving."""
+    async with Database(str(path)) as db:
+        await db.create_tables()
+        for login, count in (("alice", 5), ("bob", 2), ("alice", 2)):
+            await db.upsert_grades(
+                student=login,
+                year=2025,
+                semester=1,
+                rows=[],
+                events=[(f"M{i}", "Exam", "01/01/2025", "new", "note", None, "12") for i in range(count)],
+            )
+        pages, cursor = [], 0
+        while True:
+            rows, next_cursor = await db.changes_since(cursor, limit, student=student)
+            pages.append(([(row[0], row[1], row[4]) for row in rows], next_cursor))
+            if next_cursor == cursor:
+                return pages
+            cursor = next_cursor
+
+
+def test_changes_since_pages_by_cursor(tmp_path):
+    pages = asyncio.run(_changes_pages(tmp_path / "events.db", 4))
+    assert [len(rows) for rows, _cursor in pages] == [4, 4, 1, 0]
+    seqs = [seq for rows, _cursor in pages for seq, _student, _module in rows]
+    assert seqs == sorted(seqs) and len(set(seqs)) == 9
+    # Each cursor is the last seq of its page; an empty page leaves it where it was.
+    assert [cursor for _rows, cursor in pages] == [seqs[3], seqs[7], seqs[8], seqs[8]]
+
+
+def test_changes_since_filters_by_student(tmp_path):
+    pages = asyncio.run(_changes_pages(tmp_path / "events.db", 3, student="alice"))
+    rows = [row for page, _cursor in pages for row in page]
+    assert [(student, module) for _seq, student, module in rows] == [("alice", f"M{i}") for i in (0, 1, 2, 3, 4, 0, 1)]
+    assert [len(page) for page, _cursor in pages] == [3, 3, 1, 0]
@@ -0,0 +1,33 @@
+"""Parsed rows are immutable values, safe to hash and keep in sets."""
+
+import pytest
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from Models.Grade import Grade
+from Models.Module import Module
+from Models.UE import UE
+
+
+def test_grade_key_and_fingerprint():
+    grade = Grade("M1", "Exam", "01/01/2025", "12,5", "11", "3/40", None)
+    assert grade.key == ("M1", "Exam", "01/01/2025")
+    assert grade.fingerprint == ("12,5", "11", "3/40", "")
+    assert (grade.module_code, grade.note, grade.appreciation) == ("M1", "12,5", "")
+
+
+def test_grades_cannot_change_under_a_set():
+    grade = Grade("M1", "Exam", "01/01/2025", "12,5", "11", "3/40", "")
+    grades = {grade}
+    for name in ("note", "key", "fingerprint"):
+        with pytest.raises(AttributeError):
+            setattr(grade, name, "13")
+    assert Grade("M1", "Exam", "01/01/2025", "12,5", "11", "3/40", "") in grades
+
+
+def test_modules_and_ues_compare_by_value():
+    module = dict(module_code="M1", ue_code="UE1", title_fr="Analyse", coef=2.0, bloc_code="B1", note="12", avg_note="11", rank="3/40", ec="6")
+    ue = dict(ue_code="UE1", title_fr="Maths", ects=6.0, note="12", avg_note="11", rank="3/40", resultat="ADM")
+    assert len({Module(**module), Module(**module), Module(**{**module, "note": "13"})}) == 2
+    assert UE(**ue) == UE(**ue) and hash(UE(**ue)) == hash(UE(**ue))
+    with pytest.raises(AttributeError):
+        Module(**module).note = "13"
@@ -0,0 +1,70 @@
+"""The stream parser engine must read every page exactly as the bs4 reference does."""
+
+import random
+
+import pytest
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from benchmarks.generator import generate_semester_html
+from parsing import _bs4_tables, _stream_tables, parse_semester
+
+_ROW = "<tr>" + "".join(f"<td>{cell}</td>" for cell in ("M1", "Exam", "01/01/2025", "12,5", "11", "3/45", "Bien")) + "</tr>"
+
+MALFORMED_PAGES = {
+    "tbody outside the table": f'<table><tbody><tr><td><table id="Tests12025">{_ROW}</table></td></tr></tbody></table>',
+    "no tbody at all": f'<table id="Tests12025">{_ROW}</table>',
+    "nested tables of one kind": f'<table id="Tests1"><tbody>{_ROW}<tr><td><table id="Tests2"><tbody>{_ROW}</tbody></table></td></tr></tbody></table>',
+    "cdata cell": f'<table id="Tests1"><tbody><tr><td><![CDATA[M2]]></td>{_ROW[8:]}</tbody></table>',
+    "unclosed cells and rows": '<table id="Tests1"><tbody><tr><td>M1<td>Exam<td>01/01<td>12<td>11<td>3/4<td>ok',
+    "stray and void end tags": f'<table id="Tests1"><tbody></td></div>{_ROW[:-5]}x<br>a</br>b</tr></tbody></table>',
+    "script, style and template in cells": f'<table id="UEs1"><tbody><tr><td>U<script>1</script></td><td>T<style>p{{}}</style></td><td>6<template>x</template></td><td>12</td><td>11</td><td>1/3</td><td>ADM</td></tr></tbody></table>',
+    "character references": '<span class="semesterAverage">&#128;&#0;&#x110000;&amp&bogus;&nbsp;&#12a;12,5</span>',
+    "average on a void element": '<br class="semesterAverage"><span class="semesterAverage">12</span>',
+    "comments, declarations and instructions": f'<!DOCTYPE html><?pi?><table id="Courses1"><tbody><!-- c --><![if x]>{_ROW}</tbody></table>',
+}
+
+
+@pytest.mark.parametrize("name", sorted(MALFORMED_PAGES))
+def test_malformed_pages_match_bs4(name):
+    html = MALFORMED_PAGES[name]
+    assert _stream_tables(html) == _bs4_tables(html)
+
+
+@pytest.mark.parametrize("n_tests", [0, 1, 40, 400])
+@pytest.mark.parametrize("seed", range(3))
+def test_generated_pages_match_bs4(n_tests, seed):
+    html = generate_semester_html(n_tests=n_tests, seed=seed)
+    assert _stream_tables(html) == _bs4_tables(html)
+    assert len(parse_semester(html, "stream").grades) == n_tests
+
+
+_TAGS = ("table", "tbody", "thead", "tr", "td", "th", "div", "span", "b", "script", "style", "template", "rt", "br", "img", "textarea")
+_IDS = ("Tests12025", "Courses1", "UEs1", "tests1", "Other", "")
+_TEXTS = ("12,5", " x ", "&mdash;", "&nbsp;", "&amp", "&#128;", "&#x110000;", "&bogus;", "a\xa0b", "\n", "-", "<", "&")
+_SPECIAL = ("<!-- c -->", "<![CDATA[cd]]>", "<!DOCTYPE html>", "<?pi?>", "</>", "<td/>", "<tr/>", "<br/>", "</table", "<td")
+
+
+def _random_markup(rng: random.Random, depth: int = 0) -> str:
+    out = []
+    for _ in range(rng.randint(1, 6)):
+        roll = rng.random()
+        if roll < 0.45 and depth < 7:
+            tag = rng.choice(_TAGS)
+            attrs = f' id="{rng.choice(_IDS)}"' if tag == "table" or rng.random() < 0.1 else ""
+            if rng.random() < 0.1:
+                attrs += ' class="semesterAverage x"'
+            out.append(f"<{tag}{attrs}>{_random_markup(rng, depth + 1)}")
+            if rng.random() < 0.85:
+                out.append(f"</{rng.choice(_TAGS) if rng.random() < 0.1 else tag}>")
+        elif roll < 0.85:
+            out.append(rng.choice(_TEXTS))
+        else:
+            out.append(rng.choice(_SPECIAL))
+    return "".join(out)
+
+
+def test_random_markup_matches_bs4():
+    rng = random.Random(0)
+    for _ in range(2000):
+        html = _random_markup(rng)
+        assert _stream_tables(html) == _bs4_tables(html), html
@@ -0,0 +1,70 @@
+"""Session cookies are persisted whenever OASIS sets new values, not only at login."""
+
+import asyncio
+
+import httpx
+from cryptography.fernet import Fernet
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import sync
+from database import Database
+from sessions import SessionStore, set_session_store
+
+
+def _oasis(tokens: list[str]):
+    """A mock OASIS: logins and semester pages set the next session token from `tokens`, if any is left."""
+    requests = []
+    tokens = iter(tokens)
+
+    def handler(request):
+        requests.append("login" if "login" in request.url.params["route"] else "semester")
+        headers = [("Content-Type", "text/html")]
+        token = next(tokens, None)
+        if token is not None:
+            headers.append(("Set-Cookie", f"{sync.TOKEN_COOKIE_NAME}={token}; Max-Age=3600; Path=/"))
+            headers.append(("Set-Cookie", f"{sync.CURRENT_YEAR_COOKIE}=2025; Max-Age=3600; Path=/"))
+        return httpx.Response(200, headers=headers, text="<html></html>")
+
+    return httpx.MockTransport(handler), requests
+
+
+async def _fetch_then_restart(path, tokens: list[str], fetches: int) -> tuple[list[str], str, bool]:
+    """Fetches semester pages, then restores the saved session into a new client as after a restart."""
+    transport, requests = _oasis(tokens)
+    async with Database(str(path)) as db:
+        await db.create_tables()
+        store = SessionStore(db, Fernet.generate_key())
+        set_session_store(store)
+        try:
+            async with httpx.AsyncClient(transport=transport) as client:
+                for _ in range(fetches):
+                    await sync._fetch_semester_html(
+                        client, student="alice", year_value="2025", semester_in_year=1, tab="Courses", login="alice", password="pw"
+                    )
+            async with httpx.AsyncClient(transport=transport) as restarted:
+                restored = await store.restore(restarted, "alice", sync.SESSION_COOKIES)
+                return requests, restarted.cookies.get(sync.TOKEN_COOKIE_NAME), restored
+        finally:
+            set_session_store(None)
+
+
+def test_rotated_session_is_persisted(tmp_path):
+    requests, token, restored = asyncio.run(_fetch_then_restart(tmp_path / "s.db", ["first", "rotated"], fetches=2))
+    assert requests == ["login", "semester", "semester"]
+    assert restored and token == "rotated"
+
+
+def test_unchanged_session_is_not_rewritten(tmp_path, monkeypatch):
+    saves = []
+    original_save = SessionStore.save
+
+    async def save(self, *args):
+        saves.append(args[1])
+        await original_save(self, *args)
+
+    monkeypatch.setattr(SessionStore, "save", save)
+    # Every response re-sends the same cookie.
+    requests, token, restored = asyncio.run(_fetch_then_restart(tmp_path / "s.db", ["same"] * 4, fetches=3))
+    assert requests == ["login", "semester", "semester", "semester"]
+    assert restored and token == "same"
+    assert saves == ["alice"]
@@ -0,0 +1,120 @@
+"""Storing a semester page: which writes happen and when the read cache moves."""
+
+import asyncio
+import re
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import sync
+from api import read_cache
+from benchmarks.generator import generate_semester_html
+from database import Database
+from Models.Grade import Grade
+
+
+def _grade(module_code: str, note: str, *, name: str = "Exam", rank: str = "3/40") -> Grade:
+    return Grade(module_code, name, "01/01/2025", note, "11,0", rank, "")
+
+
+async def _sync_runs(path, runs: list[list[Grade]], *, dry_run: bool = False):
+    """Diffs each grade list against the DB in turn; returns the results and the final DB state."""
+    results = []
+    async with Database(str(path)) as db:
+        await db.create_tables()
+        for grades in runs:
+            results.append(
+                await sync._sync_grades_for_semester(
+                    db, student="alice", year=2025, semester=1, grades=grades, dry_run=dry_run
+                )
+            )
+        stored = await db.get_grades_for_semester(student="alice", year=2025, semester=1)
+        events, _cursor = await db.changes_since(0, 100, student="alice")
+    return results, [row[1:] for row in stored], [row[4:11] for row in events]
+
+
+def test_new_grades_are_inserted_with_events(tmp_path):
+    results, stored, events = asyncio.run(_sync_runs(tmp_path / "sync.db", [[_grade("M1", "12"), _grade("M2", "8")]]))
+    (new_count, updated_count, details), = results
+    assert (new_count, updated_count) == (2, 0)
+    assert details[0] == "NEW S1 M1 | Exam | 01/01/2025 | 11,0"
+    assert stored == [
+        ("M1", "Exam", "01/01/2025", "12", "11,0", "3/40", ""),
+        ("M2", "Exam", "01/01/2025", "8", "11,0", "3/40", ""),
+    ]
+    # One "new" event per fingerprint field of each grade.
+    assert len(events) == 2 * len(Grade.FINGERPRINT_FIELDS)
+    assert ("M1", "Exam", "01/01/2025", "new", "note", None, "12") in events
+
+
+def test_changed_fields_are_updated_and_logged(tmp_path):
+    first = [_grade("M1", "12"), _grade("M2", "8")]
+    second = [_grade("M1", "12"), _grade("M2", "9", rank="2/40")]
+    results, stored, events = asyncio.run(_sync_runs(tmp_path / "sync.db", [first, second]))
+    assert results[1] == (0, 1, ["UPD S1 M2 | Exam | 01/01/2025 | 11,0->11,0"])
+    assert stored[1] == ("M2", "Exam", "01/01/2025", "9", "11,0", "2/40", "")
+    assert events[-2:] == [
+        ("M2", "Exam", "01/01/2025", "update", "note", "8", "9"),
+        ("M2", "Exam", "01/01/2025", "update", "rank", "3/40", "2/40"),
+    ]
+
+
+def test_unchanged_grades_write_nothing(tmp_path):
+    grades = [_grade("M1", "12"), _grade("M2", "8")]
+    results, stored, events = asyncio.run(_sync_runs(tmp_path / "sync.db", [grades, grades]))
+    assert results[1] == (0, 0, [])
+    assert len(stored) == 2
+    assert len(events) == 2 * len(Grade.FINGERPRINT_FIELDS)
+
+
+def test_repeated_rows_on_one_page_are_diffed_against_each_other(tmp_path):
+    page = [_grade("M1", "12"), _grade("M1", "12"), _grade("M1", "13")]
+    results, stored, _events = asyncio.run(_sync_runs(tmp_path / "sync.db", [page]))
+    assert results[0][:2] == (1, 1)
+    assert stored == [("M1", "Exam", "01/01/2025", "13", "11,0", "3/40", "")]
+
+
+def test_dry_run_diffs_without_writing(tmp_path):
+    results, stored, events = asyncio.run(_sync_runs(tmp_path / "sync.db", [[_grade("M1", "12")]], dry_run=True))
+    assert results[0][:2] == (1, 0)
+    assert stored == [] and events == []
+
+
+async def _store_pages(path, pages: list[str], monkeypatch) -> list[int]:
+    """Syncs semester 1 once per page; returns the cache generation after each sync."""
+    html = iter(pages)
+
+    async def fetch(*_args, **_kwargs):
+        return next(html)
+
+    monkeypatch.setattr(sync, "_fetch_semester_html", fetch)
+    generations = []
+    async with Database(str(path)) as db:
+        await db.create_tables()
+        for _page in pages:
+            await sync._sync_semester(
+                None,
+                db,
+                login="alice",
+                password="",
+                year_value="2025",
+                year_int=2025,
+                semester=1,
+                tab="Courses",
+                fetch_slots=asyncio.Semaphore(1),
+            )
+            generations.append(read_cache.generation("alice"))
+    return generations
+
+
+def test_page_moves_without_data_changes_keep_the_cache(tmp_path, monkeypatch):
+    page = generate_semester_html(n_tests=20, seed=1)
+    moved = page.replace("</table>", "<!-- rendered in 12ms --></table>", 1)
+    generations = asyncio.run(_store_pages(tmp_path / "sync.db", [page, moved, page], monkeypatch))
+    assert generations[1] == generations[2] == generations[0]
+
+
+def test_new_grades_and_summary_changes_invalidate(tmp_path, monkeypatch):
+    page = generate_semester_html(n_tests=20, seed=1)
+    more_grades = generate_semester_html(n_tests=21, seed=1)
+    new_average = re.sub(r'(class="semesterAverage">)[^<]*', r"\g<1>19,99", more_grades)
+    generations = asyncio.run(_store_pages(tmp_path / "sync.db", [page, more_grades, new_average], monkeypatch))
+    assert generations[0] < generations[1] < generations[2]
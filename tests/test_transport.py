@@ -0,0 +1,64 @@
+"""Retries and failure accounting in the shared OASIS transport."""
+
+import asyncio
+
+import httpx
+import pytest
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import transport
+from transport import CircuitBreaker, OasisTransport
+
+
+def _send(outcomes: list, *, max_attempts: int = 3, deadline: float = 5.0, monkeypatch):
+    """Sends one request through the transport; each attempt takes the next outcome (status or exception)."""
+    monkeypatch.setattr(transport, "OASIS_BACKOFF_SECONDS", 0.001)
+    attempts = iter(outcomes)
+
+    def handler(request):
+        outcome = next(attempts)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    breaker = CircuitBreaker(threshold=10)
+    oasis = OasisTransport(inner=httpx.MockTransport(handler), max_attempts=max_attempts, deadline=deadline, breaker=breaker)
+
+    async def run():
+        async with httpx.AsyncClient(transport=oasis) as client:
+            return await client.post("https://oasis.test/ajax.php", data={"a": "1"})
+
+    try:
+        return asyncio.run(run()), breaker
+    finally:
+        # Every outcome handed out was used, and no attempt ran past them.
+        assert next(attempts, None) is None
+
+
+def test_retries_until_success(monkeypatch):
+    response, breaker = _send([503, httpx.ConnectError("refused"), 200], monkeypatch=monkeypatch)
+    assert response.status_code == 200
+    assert breaker.failures == 0
+
+
+def test_last_retryable_status_is_returned_and_counted(monkeypatch):
+    response, breaker = _send([502, 503, 503], monkeypatch=monkeypatch)
+    assert response.status_code == 503
+    assert breaker.failures == 1
+
+
+def test_last_transport_error_is_raised(monkeypatch):
+    with pytest.raises(httpx.ConnectError):
+        _send([503, 503, httpx.ConnectError("refused")], monkeypatch=monkeypatch)
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    response, breaker = _send([404], monkeypatch=monkeypatch)
+    assert response.status_code == 404
+    assert breaker.failures == 0
+
+
+def test_single_attempt(monkeypatch):
+    response, breaker = _send([500], max_attempts=1, monkeypatch=monkeypatch)
+    assert response.status_code == 500
+    assert breaker.failures == 1
@@ -0,0 +1,113 @@
+"""Webhook payloads stay within Discord's limits and are delivered independently."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import webhook
+from webhook import WebhookDispatcher, _post_payload, _to_embed_payloads
+
+
+def _embed_chars(payload: dict) -> int:
+    return sum(len(embed["title"]) + len(embed.get("description", "")) for embed in payload["embeds"])
+
+
+@pytest.mark.parametrize(
+    "messages",
+    [
+        ["Title\n" + "\n".join(f"NEW S1 M{i} | Exam | 01/01/2025 | 12" for i in range(2_000))],
+        ["Title\n" + "x" * 9_000],
+        [f"Account {i}\nNEW S1 M{i} | Exam" for i in range(25)],
+        [f"Account {i}\n" + "y" * 3_000 for i in range(7)],
+    ],
+    ids=["many lines", "one oversized line", "many small messages", "many medium messages"],
+)
+def test_payloads_respect_discord_limits(messages):
+    payloads = _to_embed_payloads(messages)
+    for payload in payloads:
+        assert len(payload["embeds"]) <= 10
+        assert _embed_chars(payload) <= 6_000
+        for embed in payload["embeds"]:
+            assert len(embed["title"]) <= 256
+            assert len(embed.get("description", "")) <= 4_096
+
+    # Nothing is dropped: the descriptions carry every line, in order, split only between or inside lines.
+    delivered = "".join(embed.get("description", "") for payload in payloads for embed in payload["embeds"])
+    assert delivered.replace("\n", "") == "".join("".join(message.splitlines()[1:]) for message in messages)
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_429_waits_for_retry_after(monkeypatch):
+    statuses = iter([429, 429, 204])
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(webhook.asyncio, "sleep", sleep)
+
+    def handler(request):
+        status = next(statuses)
+        if status == 429:
+            return httpx.Response(429, json={"retry_after": 1.5}, headers={"Retry-After": "9"})
+        return httpx.Response(status)
+
+    async def run():
+        async with _client(handler) as client:
+            await _post_payload(client, "https://discord.test/hook", {"content": "", "embeds": []})
+
+    asyncio.run(run())
+    assert sleeps == [1.5, 1.5]
+
+
+def test_429_falls_back_to_the_header(monkeypatch):
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(webhook.asyncio, "sleep", sleep)
+    monkeypatch.setattr(webhook, "WEBHOOK_MAX_ATTEMPTS", 2)
+
+    async def run():
+        async with _client(lambda request: httpx.Response(429, headers={"Retry-After": "3"})) as client:
+            await _post_payload(client, "https://discord.test/hook", {"content": "", "embeds": []})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+    assert sleeps == [3.0]
+
+
+def test_batch_continues_after_a_failed_payload(monkeypatch, capsys):
+    delivered = []
+
+    def handler(request):
+        title = json.loads(request.content)["embeds"][0]["title"]
+        if title.startswith("broken"):
+            return httpx.Response(400)
+        delivered.append(title)
+        return httpx.Response(204)
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        webhook.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+    )
+
+    async def run():
+        dispatcher = WebhookDispatcher("https://discord.test/hook", coalesce_seconds=0.05)
+        await dispatcher.start()
+        # Each message fills most of a payload, so the coalesced batch is sent as three requests.
+        for title in ("first", "broken", "last"):
+            await dispatcher.submit(f"{title}\n" + "z" * 4_000)
+        await dispatcher.stop()
+
+    asyncio.run(run())
+    assert delivered == ["first", "last"]
+    out = capsys.readouterr().out
+    assert "Webhook delivery failed" in out and "undelivered:\nbroken" in out
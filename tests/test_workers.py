@@ -0,0 +1,113 @@
+"""Account leases in SQLite: claim, renew, expiry takeover and release."""
+
+import asyncio
+from types import SimpleNamespace
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+import workers
+from database import Database
+from workers import SQLiteLeaseBackend
+
+LOGINS = ["a", "b", "c", "d"]
+TTL = 60.0
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def _run_leases(path, monkeypatch, scenario):
+    """Runs `scenario(first, second, clock)` with two workers' backends on separate connections to one DB."""
+    clock = _Clock()
+    monkeypatch.setattr(workers, "time", SimpleNamespace(time=clock.time))
+
+    async def run():
+        async with Database(str(path)) as db1, Database(str(path)) as db2:
+            await db1.create_tables()
+            first, second = SQLiteLeaseBackend(db1), SQLiteLeaseBackend(db2)
+            await first.register_accounts(LOGINS)
+            await second.register_accounts(LOGINS)
+            return await scenario(first, second, clock)
+
+    return asyncio.run(run())
+
+
+def test_claims_never_overlap(tmp_path, monkeypatch):
+    async def scenario(first, second, clock):
+        mine = await first.claim("w1", LOGINS, 3, TTL)
+        theirs = await second.claim("w2", LOGINS, 3, TTL)
+        again = await second.claim("w2", LOGINS, 3, TTL)
+        return mine, theirs, again
+
+    mine, theirs, again = _run_leases(tmp_path / "leases.db", monkeypatch, scenario)
+    assert len(mine) == 3
+    assert theirs == [login for login in LOGINS if login not in mine]
+    assert again == []
+
+
+def test_renewed_leases_are_not_taken_over(tmp_path, monkeypatch):
+    async def scenario(first, second, clock):
+        mine = await first.claim("w1", LOGINS, 4, TTL)
+        clock.now += TTL - 1
+        renewed = await first.renew("w1", mine, TTL)
+        clock.now += TTL - 1
+        return renewed, await second.claim("w2", LOGINS, 4, TTL)
+
+    renewed, taken = _run_leases(tmp_path / "leases.db", monkeypatch, scenario)
+    assert renewed == set(LOGINS)
+    assert taken == []
+
+
+def test_expired_leases_are_taken_over(tmp_path, monkeypatch):
+    async def scenario(first, second, clock):
+        await first.claim("w1", LOGINS, 2, TTL)
+        clock.now += TTL + 1
+        taken = await second.claim("w2", LOGINS, 4, TTL)
+        # The first worker finds out on its next renewal.
+        return taken, await first.renew("w1", LOGINS, TTL)
+
+    taken, still_mine = _run_leases(tmp_path / "leases.db", monkeypatch, scenario)
+    assert sorted(taken) == LOGINS
+    assert still_mine == set()
+
+
+def test_lapsed_but_unclaimed_leases_can_be_renewed(tmp_path, monkeypatch):
+    async def scenario(first, second, clock):
+        mine = await first.claim("w1", LOGINS, 2, TTL)
+        clock.now += TTL + 1
+        return mine, await first.renew("w1", LOGINS, TTL)
+
+    mine, renewed = _run_leases(tmp_path / "leases.db", monkeypatch, scenario)
+    assert renewed == set(mine)
+
+
+def test_release_and_leave_free_leases_at_once(tmp_path, monkeypatch):
+    async def scenario(first, second, clock):
+        mine = await first.claim("w1", LOGINS, 4, TTL)
+        await first.release("w1", mine[:1])
+        # Releasing someone else's lease is a no-op.
+        await second.release("w2", mine[1:])
+        released = await second.claim("w2", LOGINS, 4, TTL)
+        await first.leave("w1")
+        left = await second.claim("w2", LOGINS, 4, TTL)
+        return mine, released, left
+
+    mine, released, left = _run_leases(tmp_path / "leases.db", monkeypatch, scenario)
+    assert released == mine[:1]
+    assert sorted(left) == sorted(mine[1:])
+
+
+def test_heartbeat_counts_live_workers(tmp_path, monkeypatch):
+    async def scenario(first, second, clock):
+        counts = [await first.heartbeat("w1", TTL), await second.heartbeat("w2", TTL)]
+        clock.now += TTL + 1
+        counts.append(await second.heartbeat("w2", TTL))
+        await second.leave("w2")
+        counts.append(await first.heartbeat("w1", TTL))
+        return counts
+
+    assert _run_leases(tmp_path / "leases.db", monkeypatch, scenario) == [1, 2, 1, 1]